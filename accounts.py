@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import tweepy
+from app import db
+from models import Tweet, TwitterAccount
+from twitter_bot import publish_tweet_event
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Fallos consecutivos antes de pausar una cuenta
+FAILURE_THRESHOLD = 3
+
+# Segundos que una cuenta queda pausada tras superar el umbral
+COOLDOWN_SECONDS = 300
+
+MAX_WORKERS = 8
+
+# Nombre con el que se registra la cuenta principal (credenciales de TwitterBot)
+MAIN_ACCOUNT = 'principal'
+
+account_posts_total = metrics.registry.counter(
+    'bot_account_posts_total',
+    'Publicaciones por cuenta y resultado'
+)
+account_post_duration = metrics.registry.histogram(
+    'bot_account_post_duration_seconds',
+    'Latencia de publicación por cuenta'
+)
+
+class TokenBucket:
+    """Limitador token bucket (no bloqueante)"""
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Consumir un token si hay disponible"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class AccountClient:
+    """Cliente autenticado de una cuenta con su limitador y aislamiento de fallos"""
+
+    def __init__(self, name, client, tweets_per_hour=50.0, burst=5):
+        self.name = name
+        self.client = client
+        self.bucket = TokenBucket(tweets_per_hour / 3600.0, burst)
+        self.consecutive_failures = 0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def post(self, content):
+        """Publicar en esta cuenta; devuelve (resultado, mensaje de error)
+
+        El resultado es 'success', 'failure' o 'skipped' (pausada o sin tokens:
+        no se llegó a contactar a Twitter).
+        """
+        if time.monotonic() < self.paused_until:
+            return 'skipped', 'Cuenta pausada por fallos consecutivos'
+        if not self.bucket.try_acquire():
+            return 'skipped', 'Límite de publicación local alcanzado'
+
+        start = time.perf_counter()
+        try:
+            self.client.create_tweet(text=content)
+        except Exception as e:
+            self._record_failure()
+            return 'failure', str(e)
+        finally:
+            account_post_duration.observe(time.perf_counter() - start, account=self.name)
+
+        with self._lock:
+            self.consecutive_failures = 0
+        return 'success', None
+
+    def _record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= FAILURE_THRESHOLD:
+                self.paused_until = time.monotonic() + COOLDOWN_SECONDS
+                logger.warning(f"Cuenta {self.name} pausada {COOLDOWN_SECONDS}s tras "
+                               f"{self.consecutive_failures} fallos")
+
+class AccountRegistry:
+    """Registro de cuentas adicionales cargadas de la base de datos"""
+
+    def __init__(self):
+        self._accounts = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _build_client(self, account):
+        # Sin wait_on_rate_limit: una cuenta limitada no debe frenar a las demás
+        return tweepy.Client(
+            consumer_key=account.consumer_key,
+            consumer_secret=account.consumer_secret,
+            access_token=account.access_token,
+            access_token_secret=account.access_token_secret,
+            wait_on_rate_limit=False
+        )
+
+    def load(self):
+        """(Re)cargar las cuentas habilitadas, conservando el estado de las existentes"""
+        rows = TwitterAccount.query.filter_by(enabled=True).all()
+        with self._lock:
+            accounts = {}
+            for row in rows:
+                current = self._accounts.get(row.name)
+                if current is not None:
+                    accounts[row.name] = current
+                    continue
+                try:
+                    accounts[row.name] = AccountClient(
+                        row.name, self._build_client(row),
+                        row.tweets_per_hour or 50.0, row.burst or 5
+                    )
+                except Exception as e:
+                    logger.error(f"Error creando cliente para {row.name}: {e}")
+            self._accounts = accounts
+            self._loaded = True
+        return list(accounts)
+
+    def invalidate(self, name=None):
+        """Forzar recarga en el próximo uso (tras cambios en TwitterAccount)
+
+        Las demás cuentas conservan su token bucket y su pausa; con name, esa
+        cuenta se reconstruye (credenciales o límites nuevos).
+        """
+        with self._lock:
+            if name is not None:
+                self._accounts.pop(name, None)
+            self._loaded = False
+
+    def accounts(self, names=None):
+        """Cuentas registradas, opcionalmente filtradas por nombre"""
+        if not self._loaded:
+            self.load()
+        accounts = list(self._accounts.values())
+        if names is not None:
+            accounts = [a for a in accounts if a.name in names]
+        return accounts
+
+    def post(self, contents, tweet_type='manual', names=None, extra=None):
+        """Publicar uno o varios tweets en todas las cuentas a la vez
+
+        Cada cuenta publica su lote en orden en su propio thread; las cuentas
+        corren en paralelo. Los resultados se guardan en Tweet con una sola
+        transacción desde el thread que llama; las publicaciones omitidas solo
+        se cuentan en bot_account_posts_total. Devuelve {cuenta: [éxitos]}.
+        """
+        if isinstance(contents, str):
+            contents = [contents]
+        contents = [c if len(c) <= 280 else c[:277] + "..." for c in contents]
+
+        targets = list(extra or []) + self.accounts(names)
+        if not targets:
+            return {}
+
+        def run(account):
+            return [(content, *account.post(content), datetime.utcnow()) for content in contents]
+
+        # Los threads del pool no ven la traza del thread que llama: medir desde aquí
+        with tracing.span('create_tweet'):
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets))) as executor:
+                outcomes = dict(zip((a.name for a in targets), executor.map(run, targets)))
+
+        results = {}
+        tweets = []
+        for name, posts in outcomes.items():
+            results[name] = []
+            for content, result, error, posted_at in posts:
+                success = result == 'success'
+                results[name].append(success)
+                account_posts_total.inc(account=name, result=result)
+                if result == 'skipped':
+                    # No es un fallo de Twitter: no afecta los conteos de fallidos
+                    logger.info(f"Publicación omitida en {name}: {error}")
+                    continue
+                if success:
+                    metrics.tweets_posted_total.inc(tweet_type=tweet_type)
+                else:
+                    metrics.tweets_failed_total.inc(tweet_type=tweet_type)
+                tweets.append(Tweet(
+                    content=content,
+                    tweet_type=tweet_type,
+                    # La cuenta principal se guarda igual que en post_tweet
+                    account=None if name == MAIN_ACCOUNT else name,
+                    success=success,
+                    error_message=error,
+                    posted_at=posted_at
+                ))
+
+        try:
+            with tracing.span('commit'):
+                db.session.add_all(tweets)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error guardando resultados de publicación: {e}")
+            return results
+
+        for tweet in tweets:
+            publish_tweet_event(tweet)
+        return results
+
+# Registro global
+registry = AccountRegistry()
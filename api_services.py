@@ -2,8 +2,11 @@ import os
 import requests
 import logging
 from datetime import datetime
+from urllib.parse import urlparse
 from app import db
 from models import ApiLog
+import metrics
+import events
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +28,43 @@ class APIService:
             )
             db.session.add(log)
             db.session.commit()
+            
+            events.publish('api_log', {
+                'api_name': self.api_name,
+                'status_code': status_code,
+                'response_time': response_time,
+                'error': bool(error_message),
+                'created_at': log.created_at.strftime('%H:%M:%S')
+            })
         except Exception as e:
             logger.error(f"Error registrando log de API: {e}")
     
+    def _endpoint_label(self, url):
+        """Obtener el path del endpoint sin API keys para usar como label"""
+        path = urlparse(url).path
+        api_key = getattr(self, 'api_key', None)
+        if api_key:
+            path = path.replace(api_key, '{key}')
+        return path
+    
+    def _record_metrics(self, url, status_code, response_time, error=False):
+        """Registrar la llamada en los histogramas en memoria"""
+        endpoint = self._endpoint_label(url)
+        metrics.api_request_duration.observe(response_time, api=self.api_name, endpoint=endpoint)
+        metrics.api_requests_total.inc(api=self.api_name, endpoint=endpoint, status=status_code)
+        if error:
+            metrics.api_errors_total.inc(api=self.api_name, endpoint=endpoint)
+    
     def _make_request(self, url, params=None, headers=None):
         """Realizar petición HTTP con logging"""
         start_time = datetime.now()
+        response = None
         try:
             response = requests.get(url, params=params, headers=headers, timeout=10)
             response_time = (datetime.now() - start_time).total_seconds()
             
+            self._record_metrics(url, response.status_code, response_time,
+                                 error=response.status_code >= 400)
             self._log_api_call(
                 endpoint=url,
                 status_code=response.status_code,
@@ -48,6 +78,9 @@ class APIService:
             response_time = (datetime.now() - start_time).total_seconds()
             status_code = getattr(e.response, 'status_code', 0) if hasattr(e, 'response') else 0
             
+            # Si hubo respuesta ya se contó arriba; aquí solo errores de conexión
+            if response is None:
+                self._record_metrics(url, status_code, response_time, error=True)
             self._log_api_call(
                 endpoint=url,
                 status_code=status_code,
@@ -117,6 +150,7 @@ class CurrencyService(APIService):
     def __init__(self):
         super().__init__('ExchangeRate-API')
         self.base_url = 'https://v6.exchangerate-api.com/v6'
+        self.free_url = 'https://api.exchangerate-api.com/v4'
         # ExchangeRate-API tiene un tier gratuito sin API key requerida
         self.api_key = os.getenv('EXCHANGE_API_KEY', 'free')
     
@@ -124,7 +158,7 @@ class CurrencyService(APIService):
         """Obtener tasa de cambio entre dos monedas"""
         if self.api_key == 'free':
             # Usar endpoint gratuito
-            url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
+            url = f"{self.free_url}/latest/{from_currency}"
         else:
             url = f"{self.base_url}/{self.api_key}/latest/{from_currency}"
         
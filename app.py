@@ -26,7 +26,7 @@ app.secret_key = os.environ.get("SESSION_SECRET", "fallback-key-for-development"
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configurar la base de datos
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///bot.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("BOT_DATABASE_URI", "sqlite:///bot.db")
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
@@ -39,6 +39,7 @@ with app.app_context():
     # Importar los modelos aquí para que las tablas se creen
     import models  # noqa: F401
     db.create_all()
+    models.upgrade_schema()
 
 # Importar rutas
 from routes import *  # noqa: F401, E402
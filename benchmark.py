@@ -0,0 +1,382 @@
+"""Benchmark offline del bot.
+
+Levanta servidores HTTP locales que imitan OpenWeatherMap, ExchangeRate-API
+y NewsAPI, reemplaza el cliente de tweepy por uno falso y mide las tareas
+del scheduler y las páginas del dashboard contra una base SQLite temporal.
+
+Uso:
+    python benchmark.py --iterations 200 --concurrency 4 --latency 20
+    python benchmark.py --output nuevo.json --compare bench_results.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+def _weather_payload(path):
+    return {
+        'name': 'Buenos Aires',
+        'main': {'temp': 21.5, 'feels_like': 20.9, 'humidity': 64},
+        'weather': [{'main': 'Clouds', 'description': 'nubes dispersas'}]
+    }
+
+def _currency_payload(path):
+    base = path.rstrip('/').rsplit('/', 1)[-1]
+    return {
+        'base': base,
+        'rates': {'USD': 1.0, 'ARS': 1012.35, 'EUR': 0.92, 'BRL': 5.41}
+    }
+
+def _news_payload(path):
+    return {
+        'status': 'ok',
+        'articles': [{
+            'title': 'Titular de prueba para el benchmark del bot',
+            'source': {'name': 'Stub News'},
+            'url': 'https://example.com/noticia'
+        }]
+    }
+
+class StubServer:
+    """Servidor HTTP local con latencia y errores configurables"""
+
+    def __init__(self, name, payload, latency=0.0, error_rate=0.0):
+        self.name = name
+        self.payload = payload
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fail = stub._record_request()
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if fail:
+                    body = b'{"error": "injected"}'
+                    self.send_response(500)
+                else:
+                    body = json.dumps(stub.payload(urlparse(self.path).path)).encode('utf-8')
+                    self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _record_request(self):
+        fail = random.random() < self.error_rate
+        with self._lock:
+            self.requests += 1
+            if fail:
+                self.errors += 1
+        return fail
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class FakeTweepyClient:
+    """Reemplazo de tweepy.Client que no sale a la red"""
+
+    def __init__(self, latency=0.0, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def create_tweet(self, text):
+        import tweepy
+
+        fail = random.random() < self.error_rate
+        with self._lock:
+            self.calls += 1
+            if fail:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise tweepy.TweepyException('Error inyectado por el benchmark')
+        return {'data': {'id': str(self.calls), 'text': text}}
+
+def percentile(sorted_values, q):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_scenario(name, fn, iterations, concurrency):
+    """Ejecutar fn `iterations` veces con `concurrency` threads"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(count):
+        nonlocal errors
+        local_latencies = []
+        local_errors = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                ok = fn()
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - start)
+            if not ok:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    per_worker = [iterations // concurrency] * concurrency
+    for i in range(iterations % concurrency):
+        per_worker[i] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, per_worker))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    to_ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'name': name,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 4),
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else None,
+        'p50_ms': to_ms(percentile(latencies, 0.50)),
+        'p95_ms': to_ms(percentile(latencies, 0.95)),
+        'p99_ms': to_ms(percentile(latencies, 0.99)),
+        'max_ms': to_ms(latencies[-1] if latencies else None)
+    }
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def _seed_tweets(db, Tweet, count):
+    """Insertar tweets históricos para que las consultas tengan volumen"""
+    now = datetime.utcnow()
+    types = ['weather', 'currency', 'news']
+    batch = []
+    for i in range(count):
+        batch.append(Tweet(
+            content=f'Tweet histórico {i}',
+            tweet_type=types[i % 3],
+            success=(i % 10 != 0),
+            posted_at=now - timedelta(minutes=i)
+        ))
+        if len(batch) >= 1000:
+            db.session.add_all(batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.add_all(batch)
+        db.session.commit()
+
+def run_benchmark(args):
+    """Preparar el entorno falso y ejecutar todos los escenarios"""
+    latency = args.latency / 1000.0
+    servers = {
+        'weather': StubServer('OpenWeatherMap', _weather_payload, latency, args.error_rate).start(),
+        'currency': StubServer('ExchangeRate-API', _currency_payload, latency, args.error_rate).start(),
+        'news': StubServer('NewsAPI', _news_payload, latency, args.error_rate).start()
+    }
+    fake_client = FakeTweepyClient(args.tweet_latency / 1000.0, args.error_rate)
+
+    # Importar la app solo después de apuntar a la base temporal
+    from app import app, db
+    from models import Tweet
+    import cache
+    import scheduler
+    import tracing
+
+    # Los errores inyectados son esperados: no llenar la salida con ellos
+    logging.getLogger().setLevel(logging.CRITICAL)
+    tracing.sample_rate = args.trace_sample_rate
+
+    with app.app_context():
+        if args.seed_tweets:
+            _seed_tweets(db, Tweet, args.seed_tweets)
+
+        bot_scheduler = scheduler.BotScheduler()
+
+    bot_scheduler.bot.client = fake_client
+    bot_scheduler.weather_service.base_url = servers['weather'].url + '/data/2.5'
+    bot_scheduler.weather_service.api_key = 'bench'
+    bot_scheduler.currency_service.free_url = servers['currency'].url + '/v4'
+    bot_scheduler.currency_service.base_url = servers['currency'].url + '/v6'
+    bot_scheduler.news_service.base_url = servers['news'].url + '/v2'
+    bot_scheduler.news_service.api_key = 'bench'
+
+    # Evitar que '/' arranque el thread real del scheduler
+    bot_scheduler.running = True
+    scheduler.bot_scheduler = bot_scheduler
+
+    def job(name, fn):
+        def run():
+            # Falla si la API o la publicación fallaron (sin tweet exitoso)
+            return bot_scheduler._timed_job(name, fn) is True
+        return run
+
+    def page(path, cached=False):
+        def run():
+            if not cached:
+                # Simular una escritura entre pedidos: se mide SQL + plantillas
+                cache.bump('tweet', 'api_log', 'config')
+            return app.test_client().get(path).status_code == 200
+        return run
+
+    scenarios = [
+        ('job:weather', job('weather', bot_scheduler.post_weather_tweet)),
+        ('job:currency', job('currency', bot_scheduler.post_currency_tweet)),
+        ('job:news', job('news', bot_scheduler.post_news_tweet))
+    ]
+    for path in ('/', '/logs', '/api/stats'):
+        scenarios.append((f'GET {path}', page(path)))
+        scenarios.append((f'GET {path} [cache]', page(path, cached=True)))
+    if args.only:
+        scenarios = [s for s in scenarios if any(o in s[0] for o in args.only)]
+
+    results = []
+    try:
+        for name, fn in scenarios:
+            if args.warmup:
+                run_scenario(name, fn, args.warmup, 1)
+            result = run_scenario(name, fn, args.iterations, args.concurrency)
+            results.append(result)
+            print(_format_row(result))
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    return {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'params': {
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'latency_ms': args.latency,
+            'tweet_latency_ms': args.tweet_latency,
+            'error_rate': args.error_rate,
+            'seed_tweets': args.seed_tweets,
+            'trace_sample_rate': args.trace_sample_rate
+        },
+        'stubs': {
+            key: {'requests': s.requests, 'injected_errors': s.errors}
+            for key, s in servers.items()
+        },
+        'tweets': {'calls': fake_client.calls, 'injected_errors': fake_client.errors},
+        'results': results
+    }
+
+def _format_row(result):
+    return (f"{result['name']:<22} {result['throughput_rps']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  errores {result['errors']}")
+
+def compare(current, baseline_path):
+    """Mostrar la diferencia de p95 y throughput contra un resultado anterior"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {r['name']: r for r in baseline.get('results', [])}
+
+    print(f"\nComparación contra {baseline.get('commit') or baseline_path}:")
+    for result in current['results']:
+        old = previous.get(result['name'])
+        if not old:
+            continue
+        p95_delta = _pct_change(old['p95_ms'], result['p95_ms'])
+        rps_delta = _pct_change(old['throughput_rps'], result['throughput_rps'])
+        print(f"{result['name']:<22} p95 {p95_delta:>+7.1f}%  throughput {rps_delta:>+7.1f}%")
+
+def _pct_change(old, new):
+    if not old or new is None:
+        return 0.0
+    return (new - old) / old * 100
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark offline del bot')
+    parser.add_argument('--iterations', type=int, default=100, help='Ejecuciones por escenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='Threads concurrentes')
+    parser.add_argument('--warmup', type=int, default=5, help='Ejecuciones de calentamiento')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latencia de las APIs falsas (ms)')
+    parser.add_argument('--tweet-latency', type=float, default=0.0, help='Latencia de create_tweet (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de errores inyectados')
+    parser.add_argument('--seed-tweets', type=int, default=1000, help='Tweets históricos a insertar')
+    parser.add_argument('--trace-sample-rate', type=float, default=1.0, help='Muestreo de trazas')
+    parser.add_argument('--only', nargs='*', help='Filtrar escenarios por nombre')
+    parser.add_argument('--output', default='bench_results.json', help='Archivo JSON de resultados')
+    parser.add_argument('--compare', help='Resultado anterior contra el cual comparar')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Base de datos temporal para no tocar instance/bot.db
+    tmpdir = tempfile.mkdtemp(prefix='bot-bench-')
+    os.environ['BOT_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+
+    # Nunca autenticar contra Twitter real durante el benchmark
+    for key in ('TWITTER_CONSUMER_KEY', 'TWITTER_CONSUMER_SECRET',
+                'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET'):
+        os.environ.pop(key, None)
+
+    report = run_benchmark(args)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from flask import request, session, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import Tweet, TweetArchive, TweetRollup, ApiLog, ApiLogRollup, Configuration
+import metrics
+
+# Etiqueta de versión que invalida cada modelo
+MODEL_TAGS = {
+    Tweet: 'tweet',
+    TweetArchive: 'tweet',
+    TweetRollup: 'tweet',
+    ApiLog: 'api_log',
+    ApiLogRollup: 'api_log',
+    Configuration: 'config',
+}
+
+# Las versiones viven en memoria del proceso: al reiniciar vuelven a cero,
+# por eso los ETag incluyen un identificador de arranque.
+_BOOT_ID = uuid.uuid4().hex[:8]
+_versions = {tag: 0 for tag in set(MODEL_TAGS.values())}
+_versions_lock = threading.Lock()
+
+cache_hits_total = metrics.registry.counter(
+    'bot_cache_hits_total',
+    'Aciertos de caché'
+)
+cache_misses_total = metrics.registry.counter(
+    'bot_cache_misses_total',
+    'Fallos de caché'
+)
+
+MAX_ENTRIES = 256
+_store = OrderedDict()
+_store_lock = threading.Lock()
+
+def version(*tags):
+    """Versión actual de los datos para un conjunto de etiquetas"""
+    return tuple(_versions[tag] for tag in tags)
+
+def bump(*tags):
+    """Invalidar todo lo que depende de estas etiquetas"""
+    with _versions_lock:
+        for tag in tags:
+            _versions[tag] += 1
+
+def _tags_for(objects):
+    tags = set()
+    for obj in objects:
+        tag = MODEL_TAGS.get(type(obj))
+        if tag:
+            tags.add(tag)
+    return tags
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    tags = _tags_for(session.new) | _tags_for(session.dirty) | _tags_for(session.deleted)
+    if tags:
+        session.info.setdefault('cache_tags', set()).update(tags)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk(orm_execute_state):
+    # query.delete()/update() no pasan por el flush
+    if orm_execute_state.is_delete or orm_execute_state.is_update:
+        mapper = orm_execute_state.bind_mapper
+        tag = MODEL_TAGS.get(mapper.class_) if mapper is not None else None
+        if tag:
+            orm_execute_state.session.info.setdefault('cache_tags', set()).add(tag)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_on_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        bump(*tags)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('cache_tags', None)
+
+def _today():
+    return datetime.utcnow().date().isoformat()
+
+def get_or_render(key, tags, render, daily=False):
+    """Devolver el valor cacheado si los datos no cambiaron; si no, calcularlo
+
+    Con daily=True el valor también se invalida al cambiar el día (UTC).
+    """
+    current = version(*tags) + ((_today(),) if daily else ())
+    with _store_lock:
+        entry = _store.get(key)
+        if entry is not None and entry[0] == current:
+            _store.move_to_end(key)
+            cache_hits_total.inc(cache=key.split(':', 1)[0])
+            return entry[1]
+
+    cache_misses_total.inc(cache=key.split(':', 1)[0])
+    value = render()
+    with _store_lock:
+        _store[key] = (current, value)
+        _store.move_to_end(key)
+        while len(_store) > MAX_ENTRIES:
+            _store.popitem(last=False)
+    return value
+
+def _etag(key, tags, daily):
+    raw = f'{_BOOT_ID}:{key}:{version(*tags)}:{_today() if daily else ""}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+def conditional_response(key, tags, render, mimetype=None, daily=False):
+    """Respuesta con ETag: 304 si el cliente ya tiene esta versión, cuerpo cacheado si no"""
+    # Los mensajes flash son por usuario: no cachear ni responder 304
+    if session.get('_flashes'):
+        response = make_response(render())
+        if mimetype:
+            response.mimetype = mimetype
+        return response
+
+    etag = _etag(key, tags, daily)
+    if etag in request.if_none_match:
+        cache_hits_total.inc(cache='etag')
+        response = make_response('', 304)
+    else:
+        body = get_or_render(key, tags, render, daily=daily)
+        response = make_response(body)
+        if mimetype:
+            response.mimetype = mimetype
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
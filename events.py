@@ -0,0 +1,135 @@
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Segundos sin eventos antes de enviar un heartbeat
+HEARTBEAT_INTERVAL = 15
+
+# Milisegundos que espera el navegador antes de reconectar
+RETRY_MS = 5000
+
+# Segundos que dura una conexión antes de cerrarla; el navegador reconecta con
+# Last-Event-ID, así un worker de WSGI no queda tomado indefinidamente por pestaña
+STREAM_MAX_SECONDS = 300
+
+dropped_events_total = metrics.registry.counter(
+    'bot_sse_dropped_events_total',
+    'Eventos descartados por suscriptores lentos'
+)
+
+class _Subscriber:
+    """Cola de eventos de un cliente conectado"""
+
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lagged = False
+
+class EventBus:
+    """Bus de eventos en memoria para el dashboard
+
+    Cada evento se serializa una sola vez al publicarse; los suscriptores solo
+    reciben la cadena ya formateada, sin consultar la base de datos.
+    """
+
+    def __init__(self, history_size=100, queue_size=100):
+        # Prefijo de los ids enviados: al reiniciar el proceso los números vuelven
+        # a empezar, y un Last-Event-ID de otro arranque no se puede reenviar
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._queue_size = queue_size
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        """Publicar un evento a todos los suscriptores (no bloquea)"""
+        try:
+            payload = json.dumps(data, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Evento {event_type} no serializable: {e}")
+            return
+
+        with self._lock:
+            event = (self._next_id, event_type, payload)
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(event)
+            except queue.Full:
+                # El cliente pedirá las estadísticas completas una vez
+                subscriber.lagged = True
+                dropped_events_total.inc()
+
+    def _parse_event_id(self, last_event_id):
+        """Número de evento de un Last-Event-ID de este arranque (None si no lo es)"""
+        boot_id, _, number = str(last_event_id).partition('-')
+        if boot_id != self.boot_id or not number.isdigit():
+            return None
+        return int(number)
+
+    def subscribe(self, last_event_id=None):
+        """Registrar un suscriptor, reenviando lo que se perdió si reconecta"""
+        subscriber = _Subscriber(self._queue_size)
+        with self._lock:
+            if last_event_id:
+                last = self._parse_event_id(last_event_id)
+                if last is None:
+                    # Id de otro arranque del servidor (o inválido): no hay forma
+                    # de saber qué se perdió
+                    subscriber.lagged = True
+                else:
+                    missed = [e for e in self._history if e[0] > last]
+                    if (self._history and self._history[0][0] > last + 1) \
+                            or len(missed) > self._queue_size:
+                        # Parte de lo perdido ya no se puede reenviar
+                        subscriber.lagged = True
+                    for event in missed[-self._queue_size:]:
+                        subscriber.queue.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def stream(self, last_event_id=None, heartbeat=HEARTBEAT_INTERVAL, max_seconds=STREAM_MAX_SECONDS):
+        """Generador de Server-Sent Events para un cliente (termina tras max_seconds)"""
+        subscriber = self.subscribe(last_event_id)
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while True:
+                if subscriber.lagged:
+                    subscriber.lagged = False
+                    yield 'event: resync\ndata: {}\n\n'
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event_id, event_type, payload = subscriber.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield f'id: {self.boot_id}-{event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+# Bus global del proceso
+bus = EventBus()
+
+def publish(event_type, data):
+    """Publicar en el bus global"""
+    bus.publish(event_type, data)
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from app import db
+
+# Filas leídas por consulta; cada lote es una transacción de lectura corta
+BATCH_SIZE = 1000
+
+TWEET_FIELDS = ['id', 'posted_at', 'tweet_type', 'account', 'success', 'content', 'error_message']
+API_LOG_FIELDS = ['id', 'created_at', 'api_name', 'endpoint', 'status_code', 'response_time', 'error_message']
+
+def parse_datetime(value):
+    """Parsear una fecha ISO 8601 de los parámetros (None si está vacía)
+
+    Las fechas con zona horaria se convierten a UTC sin zona, como se guardan.
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def iter_batches(model, fields, filters=(), batch_size=BATCH_SIZE, columns=None):
+    """Recorrer una tabla por lotes ordenados por id (paginación por clave)
+
+    Se consultan solo columnas, sin objetos ORM, para que la memoria no crezca
+    con el tamaño de la exportación. `columns` permite leer un campo desde otra
+    columna del modelo; la paginación siempre usa model.id.
+    """
+    columns = columns or {}
+    selected = [columns.get(field, getattr(model, field)) for field in fields]
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, *selected).filter(
+            model.id > last_id, *filters
+        ).order_by(model.id).limit(batch_size).all()
+
+        # Cerrar la transacción de lectura entre lotes para no bloquear escrituras
+        db.session.rollback()
+
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [row[1:] for row in rows]
+        if len(rows) < batch_size:
+            return
+
+def _to_json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def ndjson_chunks(fields, batches):
+    """Serializar lotes como NDJSON (un objeto por línea)"""
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(fields, map(_to_json_value, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+def csv_chunks(fields, batches):
+    """Serializar lotes como CSV con encabezado"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_to_json_value(value) for value in row] for row in rows
+        )
+        yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Comprimir un stream de texto en formato gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
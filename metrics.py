@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Buckets de latencia en segundos (estilo Prometheus)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_key(labels):
+    """Convertir un dict de labels en una tupla ordenada y hasheable"""
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key, extra=None):
+    """Formatear labels en el formato de texto de Prometheus"""
+    pairs = list(key)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for k, v in pairs:
+        v = v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{k}="{v}"')
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    """Formatear un valor numérico"""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Contador monótono con labels"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Incrementar el contador"""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        """Renderizar en formato de texto"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+class Histogram:
+    """Histograma de buckets fijos con labels"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # key -> [conteos por bucket (+Inf al final), suma, total]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Registrar una observación"""
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager que mide la duración de un bloque"""
+        return _Timer(self, labels)
+
+    def render(self):
+        """Renderizar en formato de texto"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total_sum, total_count) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(key, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(total_sum)}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {total_count}')
+        return lines
+
+class _Timer:
+    """Context manager usado por Histogram.time()"""
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class Registry:
+    """Registro de métricas del proceso"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        """Obtener o crear un contador"""
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """Obtener o crear un histograma"""
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get_or_create(self, name, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = factory()
+                    self._metrics[name] = metric
+        return metric
+
+    def render(self):
+        """Renderizar todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+# Registro global
+registry = Registry()
+
+# Métricas de APIs externas
+api_request_duration = registry.histogram(
+    'bot_api_request_duration_seconds',
+    'Latencia de llamadas a APIs externas'
+)
+api_requests_total = registry.counter(
+    'bot_api_requests_total',
+    'Llamadas a APIs externas por código de estado'
+)
+api_errors_total = registry.counter(
+    'bot_api_errors_total',
+    'Errores en llamadas a APIs externas'
+)
+
+# Métricas de Twitter
+tweets_posted_total = registry.counter(
+    'bot_tweets_posted_total',
+    'Tweets publicados exitosamente'
+)
+tweets_failed_total = registry.counter(
+    'bot_tweets_failed_total',
+    'Tweets que fallaron al publicarse'
+)
+tweet_post_duration = registry.histogram(
+    'bot_tweet_post_duration_seconds',
+    'Latencia de publicación en Twitter'
+)
+
+# Métricas del scheduler
+scheduler_job_duration = registry.histogram(
+    'bot_scheduler_job_duration_seconds',
+    'Duración de las tareas programadas'
+)
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from app import db
 
@@ -6,9 +7,10 @@ class Tweet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     tweet_type = db.Column(db.String(50), nullable=False)  # 'news', 'weather', 'currency'
-    posted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    posted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     success = db.Column(db.Boolean, default=True)
     error_message = db.Column(db.Text)
+    account = db.Column(db.String(100))  # cuenta adicional usada (None = cuenta principal)
     
     def __repr__(self):
         return f'<Tweet {self.id}: {self.tweet_type}>'
@@ -32,7 +34,119 @@ class ApiLog(db.Model):
     status_code = db.Column(db.Integer)
     response_time = db.Column(db.Float)
     error_message = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
         return f'<ApiLog {self.api_name}: {self.status_code}>'
+
+class JobTrace(db.Model):
+    """Modelo para trazas de ejecución de tareas programadas"""
+    id = db.Column(db.Integer, primary_key=True)
+    trace_id = db.Column(db.String(32), nullable=False, index=True)
+    job_name = db.Column(db.String(50), nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    duration = db.Column(db.Float)  # segundos
+    spans = db.Column(db.Text)  # JSON compacto: [nombre, profundidad, inicio_ms, duración_ms, error]
+    profile = db.Column(db.Text)  # salida de cProfile (opcional)
+    
+    def span_list(self):
+        """Decodificar los spans guardados"""
+        return json.loads(self.spans) if self.spans else []
+    
+    def __repr__(self):
+        return f'<JobTrace {self.trace_id}: {self.job_name}>'
+
+class ApiLogRollup(db.Model):
+    """Agregados horarios de ApiLog ya compactados"""
+    id = db.Column(db.Integer, primary_key=True)
+    api_name = db.Column(db.String(50), nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    # Percentiles exactos de la hora; si llegan logs tardíos a una hora ya
+    # compactada se combinan ponderando por conteo y pasan a ser aproximados
+    p50_response_time = db.Column(db.Float)
+    p95_response_time = db.Column(db.Float)
+    
+    __table_args__ = (db.UniqueConstraint('api_name', 'hour'),)
+    
+    def __repr__(self):
+        return f'<ApiLogRollup {self.api_name} {self.hour}: {self.count}>'
+
+class TweetRollup(db.Model):
+    """Conteos horarios de tweets archivados"""
+    id = db.Column(db.Integer, primary_key=True)
+    tweet_type = db.Column(db.String(50), nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (db.UniqueConstraint('tweet_type', 'hour'),)
+    
+    def __repr__(self):
+        return f'<TweetRollup {self.tweet_type} {self.hour}: {self.count}>'
+
+class TweetArchive(db.Model):
+    """Tweets antiguos movidos fuera de la tabla principal"""
+    id = db.Column(db.Integer, primary_key=True)
+    original_id = db.Column(db.Integer)  # id que tenía en Tweet (SQLite puede reutilizarlo)
+    content = db.Column(db.Text, nullable=False)
+    tweet_type = db.Column(db.String(50), nullable=False)
+    posted_at = db.Column(db.DateTime)
+    success = db.Column(db.Boolean, default=True)
+    error_message = db.Column(db.Text)
+    account = db.Column(db.String(100))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TweetArchive {self.id}: {self.tweet_type}>'
+
+class TwitterAccount(db.Model):
+    """Cuentas de Twitter adicionales para publicar en paralelo"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    consumer_key = db.Column(db.String(200), nullable=False)
+    consumer_secret = db.Column(db.String(200), nullable=False)
+    access_token = db.Column(db.String(200), nullable=False)
+    access_token_secret = db.Column(db.String(200), nullable=False)
+    enabled = db.Column(db.Boolean, default=True)
+    tweets_per_hour = db.Column(db.Float, default=50.0)  # ritmo sostenido del token bucket
+    burst = db.Column(db.Integer, default=5)  # capacidad del token bucket
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TwitterAccount {self.name}>'
+
+# Columnas agregadas después de crear las tablas (create_all no altera tablas existentes)
+_ADDED_COLUMNS = [
+    ('tweet', 'account', 'VARCHAR(100)'),
+    ('tweet_archive', 'account', 'VARCHAR(100)'),
+    ('tweet_archive', 'original_id', 'INTEGER'),
+]
+
+# Valores iniciales de columnas agregadas, derivados de datos existentes
+_BACKFILLS = {
+    # Antes el archivo reutilizaba el id de Tweet como clave primaria
+    ('tweet_archive', 'original_id'): 'UPDATE tweet_archive SET original_id = id',
+}
+
+# Índices agregados después de crear las tablas (mismos nombres que genera index=True)
+_ADDED_INDEXES = [
+    ('ix_tweet_posted_at', 'tweet', 'posted_at'),
+    ('ix_api_log_created_at', 'api_log', 'created_at'),
+]
+
+def upgrade_schema():
+    """Agregar a bases existentes las columnas e índices nuevos de los modelos"""
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, column, ddl in _ADDED_COLUMNS:
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+                backfill = _BACKFILLS.get((table, column))
+                if backfill:
+                    conn.execute(db.text(backfill))
+        
+        for name, table, column in _ADDED_INDEXES:
+            conn.execute(db.text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})'))
@@ -0,0 +1,282 @@
+import argparse
+import logging
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import db
+from models import ApiLog, ApiLogRollup, JobTrace, Tweet, TweetArchive, TweetRollup
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_LOG_RETENTION_DAYS = 7
+DEFAULT_TWEET_RETENTION_DAYS = 90
+DEFAULT_JOB_TRACE_RETENTION_DAYS = 14
+
+# Máximo de horas procesadas por ejecución para acotar la duración del job
+MAX_HOURS_PER_RUN = 500
+
+# Páginas liberadas por PRAGMA incremental_vacuum en cada ejecución
+VACUUM_PAGES = 2000
+
+compacted_rows_total = metrics.registry.counter(
+    'bot_compacted_rows_total',
+    'Filas crudas compactadas por la política de retención'
+)
+
+def _retention_days(key, default):
+    """Leer días de retención de la configuración (mínimo 1)"""
+    from routes import get_config
+    try:
+        days = int(get_config(key, default))
+    except (TypeError, ValueError):
+        logger.warning(f"{key} inválido, usando {default}")
+        days = default
+    return max(days, 1)
+
+def _hour_floor(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+def _percentile(sorted_values, q):
+    """Percentil por rango más cercano"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def _is_error(log):
+    return bool(log.error_message) or not log.status_code or log.status_code >= 400
+
+def _merge_percentile(old_value, old_count, new_value, new_count):
+    """Combinar percentiles de dos grupos (promedio ponderado por conteo)
+
+    El resultado no es un percentil real: solo una aproximación para horas que
+    se compactan más de una vez (logs insertados con fechas ya compactadas).
+    """
+    if old_value is None or not old_count:
+        return new_value
+    if new_value is None or not new_count:
+        return old_value
+    return (old_value * old_count + new_value * new_count) / (old_count + new_count)
+
+def _rollup_api_log_hour(hour):
+    """Agregar y borrar los ApiLog de una hora en una sola transacción"""
+    next_hour = hour + timedelta(hours=1)
+    logs = ApiLog.query.filter(
+        ApiLog.created_at >= hour,
+        ApiLog.created_at < next_hour
+    ).all()
+
+    groups = {}
+    for log in logs:
+        groups.setdefault(log.api_name, []).append(log)
+
+    for api_name, group in groups.items():
+        times = sorted(l.response_time for l in group if l.response_time is not None)
+        count = len(group)
+        errors = sum(1 for l in group if _is_error(l))
+        p50 = _percentile(times, 0.50)
+        p95 = _percentile(times, 0.95)
+
+        rollup = ApiLogRollup.query.filter_by(api_name=api_name, hour=hour).first()
+        if rollup:
+            rollup.p50_response_time = _merge_percentile(rollup.p50_response_time, rollup.count, p50, count)
+            rollup.p95_response_time = _merge_percentile(rollup.p95_response_time, rollup.count, p95, count)
+            rollup.count += count
+            rollup.error_count += errors
+        else:
+            db.session.add(ApiLogRollup(
+                api_name=api_name,
+                hour=hour,
+                count=count,
+                error_count=errors,
+                p50_response_time=p50,
+                p95_response_time=p95
+            ))
+
+    ApiLog.query.filter(
+        ApiLog.created_at >= hour,
+        ApiLog.created_at < next_hour
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(logs)
+
+def _archive_tweet_hour(hour):
+    """Mover los Tweet de una hora al archivo y actualizar sus conteos"""
+    next_hour = hour + timedelta(hours=1)
+    tweets = Tweet.query.filter(
+        Tweet.posted_at >= hour,
+        Tweet.posted_at < next_hour
+    ).all()
+
+    groups = {}
+    for tweet in tweets:
+        db.session.add(TweetArchive(
+            original_id=tweet.id,
+            content=tweet.content,
+            tweet_type=tweet.tweet_type,
+            posted_at=tweet.posted_at,
+            success=tweet.success,
+            error_message=tweet.error_message,
+            account=tweet.account
+        ))
+        counts = groups.setdefault(tweet.tweet_type, [0, 0])
+        counts[0] += 1
+        if not tweet.success:
+            counts[1] += 1
+
+    for tweet_type, (count, failed) in groups.items():
+        rollup = TweetRollup.query.filter_by(tweet_type=tweet_type, hour=hour).first()
+        if rollup:
+            rollup.count += count
+            rollup.failed_count += failed
+        else:
+            db.session.add(TweetRollup(
+                tweet_type=tweet_type,
+                hour=hour,
+                count=count,
+                failed_count=failed
+            ))
+
+    Tweet.query.filter(
+        Tweet.posted_at >= hour,
+        Tweet.posted_at < next_hour
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return len(tweets)
+
+def _compact(column, cutoff, process_hour, max_hours):
+    """Procesar hora por hora las filas anteriores al corte, de la más vieja a la más nueva"""
+    total = 0
+    for _ in range(max_hours):
+        oldest = db.session.query(func.min(column)).filter(column < cutoff).scalar()
+        if oldest is None:
+            break
+        try:
+            total += process_hour(_hour_floor(oldest))
+        except Exception:
+            db.session.rollback()
+            raise
+    return total
+
+def compact_api_logs(now=None, max_hours=MAX_HOURS_PER_RUN):
+    """Compactar ApiLog anteriores al período de retención en agregados horarios"""
+    now = now or datetime.utcnow()
+    days = _retention_days('api_log_retention_days', DEFAULT_API_LOG_RETENTION_DAYS)
+    cutoff = _hour_floor(now - timedelta(days=days))
+    rows = _compact(ApiLog.created_at, cutoff, _rollup_api_log_hour, max_hours)
+    if rows:
+        compacted_rows_total.inc(rows, table='api_log')
+        logger.info(f"ApiLog compactados: {rows} filas anteriores a {cutoff}")
+    return rows
+
+def archive_tweets(now=None, max_hours=MAX_HOURS_PER_RUN):
+    """Archivar Tweet anteriores al período de retención"""
+    now = now or datetime.utcnow()
+    days = _retention_days('tweet_retention_days', DEFAULT_TWEET_RETENTION_DAYS)
+    cutoff = _hour_floor(now - timedelta(days=days))
+    rows = _compact(Tweet.posted_at, cutoff, _archive_tweet_hour, max_hours)
+    if rows:
+        compacted_rows_total.inc(rows, table='tweet')
+        logger.info(f"Tweets archivados: {rows} filas anteriores a {cutoff}")
+    return rows
+
+def prune_job_traces(now=None):
+    """Borrar trazas de tareas anteriores al período de retención (no se agregan)"""
+    now = now or datetime.utcnow()
+    days = _retention_days('job_trace_retention_days', DEFAULT_JOB_TRACE_RETENTION_DAYS)
+    cutoff = now - timedelta(days=days)
+    try:
+        rows = JobTrace.query.filter(JobTrace.started_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if rows:
+        compacted_rows_total.inc(rows, table='job_trace')
+        logger.info(f"Trazas borradas: {rows} filas anteriores a {cutoff}")
+    return rows
+
+def incremental_vacuum(pages=VACUUM_PAGES):
+    """Devolver páginas libres al sistema de archivos (solo SQLite en modo incremental)"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    raw = db.engine.raw_connection()
+    try:
+        mode = raw.cursor().execute('PRAGMA auto_vacuum').fetchone()[0]
+        if mode != 2:
+            # El cambio de modo reescribe todo el archivo: no se hace desde el job
+            logger.debug("auto_vacuum incremental no activado; ver python retention.py --enable-incremental-vacuum")
+            return False
+        # sqlite3.execute() avanza el pragma un solo paso (una página);
+        # executescript lo ejecuta hasta el final
+        raw.driver_connection.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        return True
+    finally:
+        raw.close()
+
+def enable_incremental_vacuum():
+    """Activar auto_vacuum incremental en SQLite (paso manual, una sola vez)
+
+    Requiere un VACUUM completo: reescribe el archivo con un lock exclusivo,
+    así que conviene correrlo con el bot detenido.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+
+    raw = db.engine.raw_connection()
+    try:
+        raw.driver_connection.executescript('PRAGMA auto_vacuum = INCREMENTAL; VACUUM;')
+    finally:
+        raw.close()
+    # Las conexiones del pool conservan el modo anterior hasta reabrirse
+    db.engine.dispose()
+    return True
+
+def run_compaction(now=None):
+    """Job de retención: agregados, archivo, trazas viejas y vacuum incremental"""
+    try:
+        with tracing.span('compact_api_logs'):
+            api_rows = compact_api_logs(now)
+        with tracing.span('archive_tweets'):
+            tweet_rows = archive_tweets(now)
+        with tracing.span('prune_job_traces'):
+            trace_rows = prune_job_traces(now)
+        if api_rows or tweet_rows or trace_rows:
+            with tracing.span('incremental_vacuum'):
+                incremental_vacuum()
+    except Exception as e:
+        logger.error(f"Error en compactación: {e}")
+
+def tweet_totals():
+    """Totales de tweets archivados (total, fallidos) a partir de los agregados"""
+    total, failed = db.session.query(
+        func.coalesce(func.sum(TweetRollup.count), 0),
+        func.coalesce(func.sum(TweetRollup.failed_count), 0)
+    ).one()
+    return int(total), int(failed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mantenimiento de retención del bot')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help='Activar auto_vacuum incremental (VACUUM completo, una sola vez)')
+    parser.add_argument('--compact', action='store_true', help='Ejecutar la compactación ahora')
+    args = parser.parse_args(argv)
+
+    from app import app
+    with app.app_context():
+        if args.enable_incremental_vacuum:
+            if enable_incremental_vacuum():
+                print("auto_vacuum incremental activado")
+            else:
+                print("La base de datos no es SQLite: nada que hacer")
+        if args.compact:
+            run_compaction()
+            print("Compactación ejecutada")
+        if not (args.enable_incremental_vacuum or args.compact):
+            parser.print_help()
+
+if __name__ == '__main__':
+    main()
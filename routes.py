@@ -1,28 +1,129 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
+from itertools import chain
 from datetime import datetime, timedelta
 from app import app, db
-from models import Tweet, Configuration, ApiLog
+from models import Tweet, Configuration, ApiLog, JobTrace, TweetArchive, TwitterAccount
 from twitter_bot import TwitterBot
 from api_services import WeatherService, CurrencyService, NewsService
+from retention import tweet_totals
+import export
+import cache
+import events
+import metrics
+import tracing
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
+# Claves de configuración conocidas y su descripción
+CONFIG_DESCRIPTIONS = {
+    'twitter_consumer_key': 'API Key de Twitter',
+    'twitter_consumer_secret': 'API Secret de Twitter',
+    'twitter_access_token': 'Access Token de Twitter',
+    'twitter_access_token_secret': 'Access Token Secret de Twitter',
+    'openweather_api_key': 'API Key de OpenWeatherMap',
+    'news_api_key': 'API Key de NewsAPI',
+    'weather_city': 'Ciudad para el clima',
+    'currency_from': 'Moneda base (ej: USD)',
+    'currency_to': 'Moneda destino (ej: ARS)',
+    'news_category': 'Categoría de noticias',
+    'news_country': 'País para noticias',
+    'tweet_schedule_weather': 'Horarios para clima (separados por coma)',
+    'tweet_schedule_currency': 'Horarios para moneda (separados por coma)',
+    'tweet_schedule_news': 'Horarios para noticias (separados por coma)',
+    'trace_sample_rate': 'Fracción de tareas trazadas (0.0 - 1.0)',
+    'api_log_retention_days': 'Días de retención de logs de APIs',
+    'tweet_retention_days': 'Días de retención de tweets',
+    'job_trace_retention_days': 'Días de retención de trazas de tareas',
+}
+
+# Claves que leen los horarios del scheduler
+SCHEDULE_KEYS = {
+    'tweet_schedule_weather', 'tweet_schedule_currency', 'tweet_schedule_news',
+    'trace_sample_rate',
+}
+
+# Claves cuyo valor no se devuelve por la API JSON
+SECRET_KEYS = {
+    'twitter_consumer_key', 'twitter_consumer_secret',
+    'twitter_access_token', 'twitter_access_token_secret',
+    'openweather_api_key', 'news_api_key',
+}
+
 def get_config(key, default=None):
     """Obtener configuración de la base de datos"""
     config = Configuration.query.filter_by(key=key).first()
     return config.value if config else default
 
+def get_configs(keys, default=None):
+    """Obtener varias configuraciones en una sola consulta"""
+    rows = Configuration.query.filter(Configuration.key.in_(list(keys))).all()
+    found = {config.key: config.value for config in rows}
+    return {key: found.get(key, default) for key in keys}
+
 def set_config(key, value, description=None):
     """Establecer configuración en la base de datos"""
-    config = Configuration.query.filter_by(key=key).first()
-    if config:
-        config.value = value
-        config.updated_at = datetime.utcnow()
-    else:
-        config = Configuration(key=key, value=value, description=description)
-        db.session.add(config)
-    db.session.commit()
+    set_configs({key: value}, {key: description})
+
+def set_configs(values, descriptions=None):
+    """Establecer varias configuraciones en una sola transacción
+    
+    Solo se escriben los valores que cambiaron. Devuelve la lista de claves modificadas.
+    """
+    descriptions = descriptions or {}
+    existing = {
+        config.key: config
+        for config in Configuration.query.filter(Configuration.key.in_(list(values))).all()
+    }
+    
+    changed = []
+    now = datetime.utcnow()
+    try:
+        for key, value in values.items():
+            config = existing.get(key)
+            if config is None:
+                db.session.add(Configuration(key=key, value=value, description=descriptions.get(key)))
+                changed.append(key)
+            elif config.value != value:
+                config.value = value
+                config.updated_at = now
+                changed.append(key)
+        
+        if changed:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return changed
+
+def validate_configs(values):
+    """Validar los valores que lee el scheduler antes de guardarlos
+    
+    Devuelve un diccionario {clave: mensaje} con los valores inválidos.
+    """
+    from scheduler import parse_schedule_times, parse_sample_rate
+    
+    errors = {}
+    for key, value in values.items():
+        try:
+            if key.startswith('tweet_schedule_'):
+                parse_schedule_times(value)
+            elif key == 'trace_sample_rate':
+                parse_sample_rate(value)
+        except ValueError as e:
+            errors[key] = str(e)
+    return errors
+
+def refresh_scheduler_if_needed(changed_keys):
+    """Refrescar el scheduler solo si cambió alguna clave de horarios"""
+    if not SCHEDULE_KEYS.intersection(changed_keys):
+        return False
+    
+    from scheduler import refresh_scheduler
+    refresh_scheduler()
+    return True
 
 @app.route('/')
 def index():
@@ -34,72 +135,77 @@ def index():
     except Exception as e:
         logger.warning(f"No se pudo inicializar scheduler: {e}")
     
-    # Estadísticas de tweets
-    total_tweets = Tweet.query.count()
-    today_tweets = Tweet.query.filter(
-        Tweet.posted_at >= datetime.utcnow().date()
-    ).count()
-    
-    successful_tweets = Tweet.query.filter_by(success=True).count()
-    failed_tweets = Tweet.query.filter_by(success=False).count()
-    
-    # Últimos tweets
-    recent_tweets = Tweet.query.order_by(Tweet.posted_at.desc()).limit(10).all()
+    def render():
+        stats = tweet_stats()
+        
+        # Fragmento de últimos tweets: solo depende de la tabla Tweet
+        recent_tweets_html = cache.get_or_render(
+            'fragment:recent_tweets', ('tweet',),
+            lambda: render_template(
+                '_recent_tweets.html',
+                recent_tweets=Tweet.query.order_by(Tweet.posted_at.desc()).limit(10).all()
+            )
+        )
+        
+        # Logs de APIs recientes
+        recent_api_logs = ApiLog.query.order_by(ApiLog.created_at.desc()).limit(5).all()
+        
+        return render_template('index.html',
+                             total_tweets=stats['total'],
+                             today_tweets=stats['today'],
+                             successful_tweets=stats['successful'],
+                             failed_tweets=stats['failed'],
+                             recent_tweets_html=recent_tweets_html,
+                             recent_api_logs=recent_api_logs)
     
-    # Logs de APIs recientes
-    recent_api_logs = ApiLog.query.order_by(ApiLog.created_at.desc()).limit(5).all()
+    return cache.conditional_response('page:index', ('tweet', 'api_log'), render, daily=True)
+
+def tweet_stats():
+    """Conteos de tweets (incluye archivados), cacheados hasta el próximo cambio"""
+    def compute():
+        total = Tweet.query.count()
+        today = Tweet.query.filter(
+            Tweet.posted_at >= datetime.utcnow().date()
+        ).count()
+        successful = Tweet.query.filter_by(success=True).count()
+        failed = Tweet.query.filter_by(success=False).count()
+        
+        # Sumar los tweets ya archivados por la política de retención
+        archived_total, archived_failed = tweet_totals()
+        return {
+            'total': total + archived_total,
+            'today': today,
+            'successful': successful + archived_total - archived_failed,
+            'failed': failed + archived_failed
+        }
     
-    return render_template('index.html',
-                         total_tweets=total_tweets,
-                         today_tweets=today_tweets,
-                         successful_tweets=successful_tweets,
-                         failed_tweets=failed_tweets,
-                         recent_tweets=recent_tweets,
-                         recent_api_logs=recent_api_logs)
+    return cache.get_or_render('stats:tweets', ('tweet',), compute, daily=True)
 
 @app.route('/config', methods=['GET', 'POST'])
 def config():
     """Página de configuración"""
     if request.method == 'POST':
-        # Guardar configuraciones
-        configs = [
-            ('twitter_consumer_key', 'API Key de Twitter'),
-            ('twitter_consumer_secret', 'API Secret de Twitter'),
-            ('twitter_access_token', 'Access Token de Twitter'),
-            ('twitter_access_token_secret', 'Access Token Secret de Twitter'),
-            ('openweather_api_key', 'API Key de OpenWeatherMap'),
-            ('news_api_key', 'API Key de NewsAPI'),
-            ('weather_city', 'Ciudad para el clima'),
-            ('currency_from', 'Moneda base (ej: USD)'),
-            ('currency_to', 'Moneda destino (ej: ARS)'),
-            ('news_category', 'Categoría de noticias'),
-            ('news_country', 'País para noticias'),
-            ('tweet_schedule_weather', 'Horarios para clima (separados por coma)'),
-            ('tweet_schedule_currency', 'Horarios para moneda (separados por coma)'),
-            ('tweet_schedule_news', 'Horarios para noticias (separados por coma)'),
-        ]
-        
-        for key, description in configs:
+        # Guardar configuraciones (los campos vacíos no se modifican)
+        values = {}
+        for key in CONFIG_DESCRIPTIONS:
             value = request.form.get(key, '')
             if value:
-                set_config(key, value, description)
+                values[key] = value
+        
+        errors = validate_configs(values)
+        if errors:
+            for key, message in errors.items():
+                flash(f'{CONFIG_DESCRIPTIONS[key]}: {message}', 'error')
+            return redirect(url_for('config'))
+        
+        changed = set_configs(values, CONFIG_DESCRIPTIONS)
+        refresh_scheduler_if_needed(changed)
         
         flash('Configuración guardada exitosamente', 'success')
         return redirect(url_for('config'))
     
     # Obtener configuraciones actuales
-    current_config = {}
-    config_keys = [
-        'twitter_consumer_key', 'twitter_consumer_secret', 
-        'twitter_access_token', 'twitter_access_token_secret',
-        'openweather_api_key', 'news_api_key',
-        'weather_city', 'currency_from', 'currency_to',
-        'news_category', 'news_country',
-        'tweet_schedule_weather', 'tweet_schedule_currency', 'tweet_schedule_news'
-    ]
-    
-    for key in config_keys:
-        current_config[key] = get_config(key, '')
+    current_config = get_configs(CONFIG_DESCRIPTIONS, '')
     
     return render_template('config.html', config=current_config)
 
@@ -107,13 +213,236 @@ def config():
 def logs():
     """Página de logs y historial"""
     page = request.args.get('page', 1, type=int)
-    tweets = Tweet.query.order_by(Tweet.posted_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
     
-    api_logs = ApiLog.query.order_by(ApiLog.created_at.desc()).limit(50).all()
+    def render():
+        tweets = Tweet.query.order_by(Tweet.posted_at.desc()).paginate(
+            page=page, per_page=20, error_out=False
+        )
+        
+        api_logs = ApiLog.query.order_by(ApiLog.created_at.desc()).limit(50).all()
+        
+        return render_template('logs.html', tweets=tweets, api_logs=api_logs)
+    
+    return cache.conditional_response(f'page:logs:{page}', ('tweet', 'api_log'), render)
+
+def _export_response(name, fields, batches):
+    """Armar la respuesta de exportación en streaming según ?format= y ?gzip="""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt == 'csv':
+        chunks = export.csv_chunks(fields, batches)
+        mimetype = 'text/csv'
+    else:
+        fmt = 'ndjson'
+        chunks = export.ndjson_chunks(fields, batches)
+        mimetype = 'application/x-ndjson'
+    
+    filename = f'{name}.{fmt}'
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = export.gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+def _export_range():
+    """Leer ?since= y ?until= (ISO 8601)"""
+    return (export.parse_datetime(request.args.get('since')),
+            export.parse_datetime(request.args.get('until')))
+
+@app.route('/export/tweets')
+def export_tweets():
+    """Exportar historial de tweets (filtros: since, until, type, archived)"""
+    try:
+        since, until = _export_range()
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida, usar formato ISO 8601'}), 400
+    
+    tweet_type = request.args.get('type')
+    
+    def filters(model):
+        conditions = []
+        if since:
+            conditions.append(model.posted_at >= since)
+        if until:
+            conditions.append(model.posted_at < until)
+        if tweet_type:
+            conditions.append(model.tweet_type == tweet_type)
+        return conditions
+    
+    batches = export.iter_batches(Tweet, export.TWEET_FIELDS, filters(Tweet))
+    if request.args.get('archived') in ('1', 'true'):
+        # Los archivados son anteriores a los tweets vivos, así que van primero;
+        # se exportan con el id que tenían en Tweet
+        archived = export.iter_batches(
+            TweetArchive, export.TWEET_FIELDS, filters(TweetArchive),
+            columns={'id': TweetArchive.original_id}
+        )
+        batches = chain(archived, batches)
     
-    return render_template('logs.html', tweets=tweets, api_logs=api_logs)
+    return _export_response('tweets', export.TWEET_FIELDS, batches)
+
+@app.route('/export/api_logs')
+def export_api_logs():
+    """Exportar logs de APIs (filtros: since, until, api)"""
+    try:
+        since, until = _export_range()
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida, usar formato ISO 8601'}), 400
+    
+    conditions = []
+    if since:
+        conditions.append(ApiLog.created_at >= since)
+    if until:
+        conditions.append(ApiLog.created_at < until)
+    if request.args.get('api'):
+        conditions.append(ApiLog.api_name == request.args.get('api'))
+    
+    batches = export.iter_batches(ApiLog, export.API_LOG_FIELDS, conditions)
+    return _export_response('api_logs', export.API_LOG_FIELDS, batches)
+
+@app.route('/api/config', methods=['GET'])
+def api_config_get():
+    """API JSON para leer la configuración (claves opcionales en ?keys=a,b)"""
+    keys_param = request.args.get('keys')
+    keys = [k.strip() for k in keys_param.split(',') if k.strip()] if keys_param else list(CONFIG_DESCRIPTIONS)
+    
+    unknown = [key for key in keys if key not in CONFIG_DESCRIPTIONS]
+    if unknown:
+        return jsonify({'error': 'Claves desconocidas', 'keys': unknown}), 400
+    
+    values = get_configs(keys)
+    for key in SECRET_KEYS.intersection(values):
+        if values[key]:
+            values[key] = '***'
+    return jsonify(values)
+
+@app.route('/api/config', methods=['POST', 'PUT'])
+def api_config_set():
+    """API JSON para actualizar varias configuraciones en una sola transacción"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({'error': 'Se esperaba un objeto JSON con claves y valores'}), 400
+    
+    unknown = [key for key in data if key not in CONFIG_DESCRIPTIONS]
+    if unknown:
+        return jsonify({'error': 'Claves desconocidas', 'keys': unknown}), 400
+    
+    values = {}
+    for key, value in data.items():
+        # Un valor enmascarado devuelto por el GET significa "sin cambios"
+        if key in SECRET_KEYS and value == '***':
+            continue
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return jsonify({'error': f'Valor inválido para {key}'}), 400
+        values[key] = str(value)
+    
+    errors = validate_configs(values)
+    if errors:
+        return jsonify({'error': 'Valores inválidos', 'keys': errors}), 400
+    
+    try:
+        changed = set_configs(values, CONFIG_DESCRIPTIONS)
+    except Exception as e:
+        logger.error(f"Error guardando configuración: {e}")
+        return jsonify({'error': 'No se pudo guardar la configuración'}), 500
+    
+    refreshed = refresh_scheduler_if_needed(changed)
+    return jsonify({'updated': changed, 'scheduler_refreshed': refreshed})
+
+def _is_positive_number(value):
+    """Número JSON finito y mayor que cero (los booleanos no cuentan)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return math.isfinite(value) and value > 0
+
+def _account_dict(account):
+    """Representación JSON de una cuenta (sin credenciales)"""
+    return {
+        'name': account.name,
+        'enabled': account.enabled,
+        'tweets_per_hour': account.tweets_per_hour,
+        'burst': account.burst,
+        'created_at': account.created_at.isoformat() if account.created_at else None
+    }
+
+@app.route('/api/accounts', methods=['GET'])
+def api_accounts_list():
+    """Listar cuentas adicionales de Twitter"""
+    accounts = TwitterAccount.query.order_by(TwitterAccount.name).all()
+    return jsonify([_account_dict(a) for a in accounts])
+
+@app.route('/api/accounts', methods=['POST'])
+def api_accounts_save():
+    """Crear o actualizar una cuenta adicional de Twitter"""
+    from accounts import registry, MAIN_ACCOUNT
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data.get('name'):
+        return jsonify({'error': 'Se requiere un objeto JSON con "name"'}), 400
+    if data['name'] == MAIN_ACCOUNT:
+        return jsonify({'error': f'"{MAIN_ACCOUNT}" está reservado para la cuenta principal'}), 400
+    
+    # Un ritmo no positivo o NaN vaciaría el token bucket para siempre
+    if 'enabled' in data and not isinstance(data['enabled'], bool):
+        return jsonify({'error': 'enabled debe ser true o false'}), 400
+    if 'tweets_per_hour' in data and not _is_positive_number(data['tweets_per_hour']):
+        return jsonify({'error': 'tweets_per_hour debe ser un número positivo'}), 400
+    if 'burst' in data and not (_is_positive_number(data['burst']) and isinstance(data['burst'], int)):
+        return jsonify({'error': 'burst debe ser un entero mayor o igual a 1'}), 400
+    
+    credential_fields = ['consumer_key', 'consumer_secret', 'access_token', 'access_token_secret']
+    account = TwitterAccount.query.filter_by(name=data['name']).first()
+    if account is None:
+        missing = [f for f in credential_fields if not data.get(f)]
+        if missing:
+            return jsonify({'error': 'Faltan credenciales', 'fields': missing}), 400
+        account = TwitterAccount(name=data['name'])
+        db.session.add(account)
+    
+    for field in credential_fields:
+        if data.get(field):
+            setattr(account, field, data[field])
+    if 'enabled' in data:
+        account.enabled = data['enabled']
+    if 'tweets_per_hour' in data:
+        account.tweets_per_hour = float(data['tweets_per_hour'])
+    if 'burst' in data:
+        account.burst = data['burst']
+    
+    db.session.commit()
+    
+    # Reconstruir el cliente solo si cambió algo que usa; si no, conservar su estado
+    rebuilt = any(data.get(f) for f in credential_fields) or 'tweets_per_hour' in data or 'burst' in data
+    registry.invalidate(account.name if rebuilt else None)
+    return jsonify(_account_dict(account))
+
+@app.route('/api/accounts/<name>', methods=['DELETE'])
+def api_accounts_delete(name):
+    """Eliminar una cuenta adicional de Twitter"""
+    from accounts import registry
+    
+    account = TwitterAccount.query.filter_by(name=name).first()
+    if account is None:
+        return jsonify({'error': 'Cuenta no encontrada'}), 404
+    
+    db.session.delete(account)
+    db.session.commit()
+    registry.invalidate()
+    return jsonify({'deleted': name})
+
+@app.route('/traces')
+def traces():
+    """Página de trazas de tareas programadas"""
+    job_traces = JobTrace.query.order_by(JobTrace.started_at.desc()).limit(20).all()
+    return render_template('traces.html', traces=job_traces)
+
+@app.route('/traces/profile', methods=['POST'])
+def profile_next_run():
+    """Activar cProfile para la próxima tarea programada"""
+    tracing.request_profile()
+    flash('La próxima tarea programada se ejecutará con cProfile', 'info')
+    return redirect(url_for('traces'))
 
 @app.route('/test_tweet', methods=['POST'])
 def test_tweet():
@@ -160,26 +489,42 @@ def test_tweet():
 @app.route('/api/stats')
 def api_stats():
     """API endpoint para estadísticas en tiempo real"""
-    stats = {
-        'total_tweets': Tweet.query.count(),
-        'today_tweets': Tweet.query.filter(
-            Tweet.posted_at >= datetime.utcnow().date()
-        ).count(),
-        'success_rate': 0,
-        'last_tweet': None
-    }
-    
-    total = Tweet.query.count()
-    if total > 0:
-        successful = Tweet.query.filter_by(success=True).count()
-        stats['success_rate'] = round((successful / total) * 100, 2)
-    
-    last_tweet = Tweet.query.order_by(Tweet.posted_at.desc()).first()
-    if last_tweet:
-        stats['last_tweet'] = {
-            'content': last_tweet.content[:100] + '...' if len(last_tweet.content) > 100 else last_tweet.content,
-            'type': last_tweet.tweet_type,
-            'posted_at': last_tweet.posted_at.strftime('%H:%M:%S')
+    def render():
+        counts = tweet_stats()
+        stats = {
+            'total_tweets': counts['total'],
+            'today_tweets': counts['today'],
+            'success_rate': 0,
+            'last_tweet': None
         }
+        
+        if counts['total'] > 0:
+            stats['success_rate'] = round((counts['successful'] / counts['total']) * 100, 2)
+        
+        last_tweet = Tweet.query.order_by(Tweet.posted_at.desc()).first()
+        if last_tweet:
+            stats['last_tweet'] = {
+                'content': last_tweet.content[:100] + '...' if len(last_tweet.content) > 100 else last_tweet.content,
+                'type': last_tweet.tweet_type,
+                'posted_at': last_tweet.posted_at.strftime('%H:%M:%S')
+            }
+        
+        return app.json.dumps(stats)
     
-    return jsonify(stats)
+    return cache.conditional_response('api:stats', ('tweet',), render,
+                                      mimetype='application/json', daily=True)
+
+@app.route('/events')
+def event_stream():
+    """Server-Sent Events con tweets, logs de API y tareas en vivo"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    # Sin stream_with_context: el stream no usa la base de datos
+    return Response(events.bus.stream(last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en memoria en formato de texto de Prometheus (sin consultas a la BD)"""
+    return Response(metrics.registry.render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,3 +1,4 @@
+import re
 import schedule
 import time
 import threading
@@ -5,9 +6,33 @@ import logging
 from datetime import datetime
 from twitter_bot import TwitterBot
 from api_services import WeatherService, CurrencyService, NewsService
+import metrics
+import tracing
+import events
 
 logger = logging.getLogger(__name__)
 
+_TIME_RE = re.compile(r'^([01]\d|2[0-3]):[0-5]\d(:[0-5]\d)?$')
+
+def parse_schedule_times(value):
+    """Parsear una lista de horarios HH:MM[:SS] separados por coma (ValueError si alguno es inválido)"""
+    times = []
+    for time_str in (value or '').split(','):
+        time_str = time_str.strip()
+        if not time_str:
+            continue
+        if not _TIME_RE.match(time_str):
+            raise ValueError(f"horario inválido '{time_str}' (formato HH:MM o HH:MM:SS)")
+        times.append(time_str)
+    return times
+
+def parse_sample_rate(value):
+    """Parsear la fracción de muestreo de trazas (ValueError si no está entre 0 y 1)"""
+    rate = float(value)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"trace_sample_rate debe estar entre 0 y 1 (recibido {value})")
+    return rate
+
 class BotScheduler:
     """Manejador de tareas programadas para el bot"""
     
@@ -18,6 +43,7 @@ class BotScheduler:
         self.news_service = NewsService()
         self.running = False
         self.thread = None
+        self.jobs = schedule.Scheduler()
     
     def start(self):
         """Iniciar el scheduler"""
@@ -43,56 +69,94 @@ class BotScheduler:
         """Configurar horarios de publicación"""
         from routes import get_config
         
-        # Limpiar schedules anteriores
-        schedule.clear()
+        # Los jobs nuevos se arman en un scheduler aparte y solo reemplazan a los
+        # anteriores cuando están todos listos: un horario inválido no deja el bot sin jobs
+        jobs = schedule.Scheduler()
+        
+        # Muestreo de trazas
+        try:
+            sample_rate = parse_sample_rate(get_config('trace_sample_rate', '1.0'))
+        except ValueError:
+            logger.warning("trace_sample_rate inválido, usando 1.0")
+            sample_rate = 1.0
         
         # Configurar tweets de clima
-        weather_times = get_config('tweet_schedule_weather', '08:00,14:00,20:00')
-        for time_str in weather_times.split(','):
-            time_str = time_str.strip()
-            if time_str:
-                schedule.every().day.at(time_str).do(self.post_weather_tweet)
-                logger.info(f"Programado tweet de clima a las {time_str}")
+        weather_times = self._schedule_times('tweet_schedule_weather', '08:00,14:00,20:00')
+        for time_str in weather_times:
+            jobs.every().day.at(time_str).do(self._timed_job, 'weather', self.post_weather_tweet)
+            logger.info(f"Programado tweet de clima a las {time_str}")
         
         # Configurar tweets de moneda
-        currency_times = get_config('tweet_schedule_currency', '09:00,15:00')
-        for time_str in currency_times.split(','):
-            time_str = time_str.strip()
-            if time_str:
-                schedule.every().day.at(time_str).do(self.post_currency_tweet)
-                logger.info(f"Programado tweet de moneda a las {time_str}")
+        currency_times = self._schedule_times('tweet_schedule_currency', '09:00,15:00')
+        for time_str in currency_times:
+            jobs.every().day.at(time_str).do(self._timed_job, 'currency', self.post_currency_tweet)
+            logger.info(f"Programado tweet de moneda a las {time_str}")
         
         # Configurar tweets de noticias
-        news_times = get_config('tweet_schedule_news', '12:00,18:00')
-        for time_str in news_times.split(','):
-            time_str = time_str.strip()
-            if time_str:
-                schedule.every().day.at(time_str).do(self.post_news_tweet)
-                logger.info(f"Programado tweet de noticias a las {time_str}")
+        news_times = self._schedule_times('tweet_schedule_news', '12:00,18:00')
+        for time_str in news_times:
+            jobs.every().day.at(time_str).do(self._timed_job, 'news', self.post_news_tweet)
+            logger.info(f"Programado tweet de noticias a las {time_str}")
+        
+        # Compactación de historial (retención de ApiLog y Tweet)
+        jobs.every().hour.do(self._timed_job, 'compaction', self.run_compaction)
+        
+        tracing.sample_rate = sample_rate
+        self.jobs = jobs
+    
+    def _schedule_times(self, key, default):
+        """Horarios configurados para una clave; si son inválidos se usan los por defecto"""
+        from routes import get_config
+        try:
+            return parse_schedule_times(get_config(key, default))
+        except ValueError as e:
+            logger.error(f"{key} inválido ({e}), usando {default}")
+            return parse_schedule_times(default)
+    
+    def _timed_job(self, job_name, job):
+        """Ejecutar una tarea registrando su duración y su traza"""
+        from app import app
+        
+        # El thread del scheduler no tiene contexto de Flask propio
+        start = time.perf_counter()
+        try:
+            with app.app_context():
+                with metrics.scheduler_job_duration.time(job=job_name), tracing.trace_run(job_name):
+                    return job()
+        finally:
+            events.publish('job', {
+                'job': job_name,
+                'duration': round(time.perf_counter() - start, 3)
+            })
     
     def _run_scheduler(self):
         """Ejecutar el loop del scheduler"""
         while self.running:
             try:
-                schedule.run_pending()
+                self.jobs.run_pending()
                 time.sleep(60)  # Verificar cada minuto
             except Exception as e:
                 logger.error(f"Error en scheduler: {e}")
                 time.sleep(60)
     
     def post_weather_tweet(self):
-        """Publicar tweet de clima programado"""
+        """Publicar tweet de clima programado (devuelve True si se publicó)"""
         try:
             from routes import get_config
-            city = get_config('weather_city', 'Buenos Aires')
+            with tracing.span('get_config'):
+                city = get_config('weather_city', 'Buenos Aires')
             
-            weather_data = self.weather_service.get_weather(city)
+            with tracing.span('fetch'):
+                weather_data = self.weather_service.get_weather(city)
             if weather_data:
-                content = self.bot.format_weather_tweet(weather_data)
-                success = self.bot.post_tweet(content, 'weather')
+                with tracing.span('format'):
+                    content = self.bot.format_weather_tweet(weather_data)
+                with tracing.span('post'):
+                    success = self.bot.broadcast(content, 'weather')
                 
                 if success:
                     logger.info(f"Tweet de clima publicado: {city}")
+                    return True
                 else:
                     logger.error(f"Error publicando tweet de clima: {city}")
             else:
@@ -100,21 +164,27 @@ class BotScheduler:
                 
         except Exception as e:
             logger.error(f"Error en tweet programado de clima: {e}")
+        return False
     
     def post_currency_tweet(self):
-        """Publicar tweet de moneda programado"""
+        """Publicar tweet de moneda programado (devuelve True si se publicó)"""
         try:
             from routes import get_config
-            from_currency = get_config('currency_from', 'USD')
-            to_currency = get_config('currency_to', 'ARS')
+            with tracing.span('get_config'):
+                from_currency = get_config('currency_from', 'USD')
+                to_currency = get_config('currency_to', 'ARS')
             
-            rate_data = self.currency_service.get_exchange_rate(from_currency, to_currency)
+            with tracing.span('fetch'):
+                rate_data = self.currency_service.get_exchange_rate(from_currency, to_currency)
             if rate_data:
-                content = self.bot.format_currency_tweet(rate_data, from_currency, to_currency)
-                success = self.bot.post_tweet(content, 'currency')
+                with tracing.span('format'):
+                    content = self.bot.format_currency_tweet(rate_data, from_currency, to_currency)
+                with tracing.span('post'):
+                    success = self.bot.broadcast(content, 'currency')
                 
                 if success:
                     logger.info(f"Tweet de moneda publicado: {from_currency}/{to_currency}")
+                    return True
                 else:
                     logger.error(f"Error publicando tweet de moneda: {from_currency}/{to_currency}")
             else:
@@ -122,21 +192,27 @@ class BotScheduler:
                 
         except Exception as e:
             logger.error(f"Error en tweet programado de moneda: {e}")
+        return False
     
     def post_news_tweet(self):
-        """Publicar tweet de noticias programado"""
+        """Publicar tweet de noticias programado (devuelve True si se publicó)"""
         try:
             from routes import get_config
-            category = get_config('news_category', 'general')
-            country = get_config('news_country', 'ar')
+            with tracing.span('get_config'):
+                category = get_config('news_category', 'general')
+                country = get_config('news_country', 'ar')
             
-            news_data = self.news_service.get_news(category, country)
+            with tracing.span('fetch'):
+                news_data = self.news_service.get_news(category, country)
             if news_data:
-                content = self.bot.format_news_tweet(news_data)
-                success = self.bot.post_tweet(content, 'news')
+                with tracing.span('format'):
+                    content = self.bot.format_news_tweet(news_data)
+                with tracing.span('post'):
+                    success = self.bot.broadcast(content, 'news')
                 
                 if success:
                     logger.info(f"Tweet de noticias publicado: {category}")
+                    return True
                 else:
                     logger.error(f"Error publicando tweet de noticias: {category}")
             else:
@@ -144,6 +220,12 @@ class BotScheduler:
                 
         except Exception as e:
             logger.error(f"Error en tweet programado de noticias: {e}")
+        return False
+    
+    def run_compaction(self):
+        """Compactar ApiLog y archivar Tweet antiguos"""
+        from retention import run_compaction
+        run_compaction()
     
     def refresh_schedules(self):
         """Refrescar configuración de horarios"""
@@ -5,8 +5,10 @@ document.addEventListener('DOMContentLoaded', function() {
     // Inicializar componentes
     initializeApp();
     
-    // Auto-actualización cada 5 minutos
-    setInterval(updateDashboard, 300000);
+    // Sin soporte de Server-Sent Events: volver a consultar cada 5 minutos
+    if (!window.EventSource) {
+        setInterval(updateDashboard, 300000);
+    }
 });
 
 /**
@@ -193,6 +195,156 @@ async function updateDashboard() {
     }
 }
 
+/**
+ * Conectar al stream de eventos en vivo (/events)
+ *
+ * EventSource reconecta solo y envía Last-Event-ID, así el servidor
+ * reenvía los eventos perdidos durante la desconexión.
+ */
+function connectEventStream() {
+    if (!window.EventSource) {
+        return null;
+    }
+    
+    const source = new EventSource('/events');
+    
+    source.addEventListener('tweet', function(event) {
+        handleTweetEvent(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('api_log', function(event) {
+        handleApiLogEvent(JSON.parse(event.data));
+    });
+    
+    source.addEventListener('job', function(event) {
+        const data = JSON.parse(event.data);
+        console.log(`Tarea ${data.job} finalizada en ${data.duration}s`);
+        updateTimestamp();
+    });
+    
+    // El servidor descartó eventos o se reinició: recargar la página completa
+    // (barato gracias al ETag si nada cambió)
+    source.addEventListener('resync', function() {
+        source.close();
+        location.reload();
+    });
+    
+    source.onerror = function() {
+        console.warn('Stream de eventos desconectado, reintentando...');
+    };
+    
+    return source;
+}
+
+/**
+ * Aplicar un tweet nuevo al dashboard sin consultar el servidor
+ */
+function handleTweetEvent(tweet) {
+    incrementCounter('total-tweets');
+    incrementCounter('today-tweets');
+    incrementCounter(tweet.success ? 'successful-tweets' : 'failed-tweets');
+    
+    const list = document.getElementById('recent-tweets');
+    if (list) {
+        const item = document.createElement('div');
+        item.className = 'list-group-item';
+        item.innerHTML = `
+            <div class="d-flex justify-content-between align-items-start">
+                <div class="flex-grow-1">
+                    <p class="mb-1"></p>
+                    <small class="text-muted">
+                        <i class="fas fa-tag me-1"></i><span class="tweet-type"></span>
+                        <i class="fas fa-clock ms-3 me-1"></i><span class="tweet-date"></span>
+                    </small>
+                </div>
+                <div>
+                    <span class="badge ${tweet.success ? 'bg-success' : 'bg-danger'}">
+                        <i class="fas ${tweet.success ? 'fa-check' : 'fa-times'}"></i>
+                    </span>
+                </div>
+            </div>
+        `;
+        // Texto del tweet como textContent para no interpretar HTML
+        item.querySelector('p').textContent = tweet.content;
+        item.querySelector('.tweet-type').textContent = tweet.type;
+        item.querySelector('.tweet-date').textContent = tweet.posted_at;
+        if (!tweet.success && tweet.error_message) {
+            item.querySelector('.badge').title = tweet.error_message;
+        }
+        
+        list.prepend(item);
+        trimChildren(list, 10);
+        hideIfExists('recent-tweets-empty');
+    }
+    
+    updateTimestamp();
+}
+
+/**
+ * Aplicar un log de API nuevo al panel de estado
+ */
+function handleApiLogEvent(log) {
+    const container = document.getElementById('api-status');
+    if (!container) {
+        return;
+    }
+    
+    let badge;
+    if (log.status_code === 200) {
+        badge = '<span class="badge bg-success">OK</span>';
+    } else if (log.status_code === 0) {
+        badge = '<span class="badge bg-danger">Error</span>';
+    } else {
+        badge = `<span class="badge bg-warning">${Number(log.status_code)}</span>`;
+    }
+    
+    const item = document.createElement('div');
+    item.className = 'd-flex justify-content-between align-items-center mb-2 pb-2 border-bottom api-status-item';
+    item.innerHTML = `
+        <div>
+            <strong></strong>
+            <br>
+            <small class="text-muted"></small>
+        </div>
+        <div>${badge}</div>
+    `;
+    item.querySelector('strong').textContent = log.api_name;
+    item.querySelector('small').textContent = log.created_at;
+    
+    container.prepend(item);
+    trimChildren(container, 5);
+    hideIfExists('api-status-empty');
+}
+
+/**
+ * Sumar uno a un contador numérico si el elemento existe
+ */
+function incrementCounter(elementId) {
+    const element = document.getElementById(elementId);
+    if (element) {
+        element.textContent = (parseInt(element.textContent) || 0) + 1;
+    }
+}
+
+/**
+ * Dejar solo los primeros `max` hijos de un contenedor
+ */
+function trimChildren(container, max) {
+    while (container.children.length > max) {
+        container.lastElementChild.remove();
+    }
+}
+
+/**
+ * Ocultar un elemento por id si existe
+ */
+function hideIfExists(elementId) {
+    const element = document.getElementById(elementId);
+    if (element) {
+        element.classList.add('d-none');
+    }
+}
+
 /**
  * Actualizar contador si el elemento existe
  */
@@ -291,16 +443,10 @@ function showNotification(message, type = 'info') {
 }
 
 /**
- * Exportar logs (placeholder)
+ * Exportar historial de tweets como CSV
  */
 function exportLogs() {
-    showLoadingOverlay('Preparando exportación...');
-    
-    // Simular exportación
-    setTimeout(() => {
-        hideLoadingOverlay();
-        showNotification('Funcionalidad de exportación en desarrollo', 'info');
-    }, 2000);
+    window.location.href = '/export/tweets?format=csv&archived=1';
 }
 
 /**
@@ -342,6 +488,7 @@ window.addEventListener('offline', function() {
  * Funciones globales para compatibilidad
  */
 window.refreshStats = updateDashboard;
+window.connectEventStream = connectEventStream;
 window.exportLogs = exportLogs;
 window.testConnections = testConnections;
 
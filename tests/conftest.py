@@ -0,0 +1,29 @@
+import os
+import tempfile
+import pytest
+
+# app.py crea las tablas al importarse: apuntar antes a una base temporal
+_tmpdir = tempfile.mkdtemp(prefix='bot-tests-')
+os.environ['BOT_DATABASE_URI'] = 'sqlite:///' + os.path.join(_tmpdir, 'test.db')
+
+# Nunca autenticar contra Twitter real durante los tests
+for _key in ('TWITTER_CONSUMER_KEY', 'TWITTER_CONSUMER_SECRET',
+             'TWITTER_ACCESS_TOKEN', 'TWITTER_ACCESS_TOKEN_SECRET'):
+    os.environ.pop(_key, None)
+
+from app import app as flask_app, db  # noqa: E402
+import models  # noqa: E402
+
+@pytest.fixture
+def app():
+    """App con un esquema vacío en cada test"""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        models.upgrade_schema()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
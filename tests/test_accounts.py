@@ -0,0 +1,152 @@
+import pytest
+from models import TwitterAccount
+import metrics
+
+CREDENTIALS = {
+    'consumer_key': 'ck', 'consumer_secret': 'cs',
+    'access_token': 'at', 'access_token_secret': 'ats',
+}
+
+def test_api_accounts_creates_account(client):
+    response = client.post('/api/accounts', json={'name': 'secundaria', 'tweets_per_hour': 10, 'burst': 2, **CREDENTIALS})
+    assert response.status_code == 200
+    assert response.get_json()['tweets_per_hour'] == 10.0
+    assert client.get('/api/accounts').get_json()[0]['name'] == 'secundaria'
+
+@pytest.mark.parametrize('field, value', [
+    ('tweets_per_hour', -5),
+    ('tweets_per_hour', 0),
+    ('tweets_per_hour', 'nan'),
+    ('tweets_per_hour', float('inf')),
+    ('tweets_per_hour', True),
+    ('burst', 0),
+    ('burst', 2.5),
+    ('burst', '3'),
+    ('enabled', 'false'),
+    ('enabled', 0),
+])
+def test_api_accounts_rejects_invalid_limits(client, field, value):
+    response = client.post('/api/accounts', json={'name': 'secundaria', field: value, **CREDENTIALS})
+    assert response.status_code == 400
+    assert TwitterAccount.query.count() == 0
+
+def test_api_accounts_rejects_reserved_name(client):
+    assert client.post('/api/accounts', json={'name': 'principal', **CREDENTIALS}).status_code == 400
+
+class FakeClient:
+    """Cliente de tweepy falso que puede fallar a pedido"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.posted = []
+
+    def create_tweet(self, text):
+        if self.fail:
+            raise RuntimeError('503 Service Unavailable')
+        self.posted.append(text)
+
+def test_skipped_posts_are_not_failures(app):
+    from accounts import AccountRegistry, AccountClient
+    from models import Tweet
+
+    registry = AccountRegistry()
+    registry._loaded = True
+    client = FakeClient()
+    account = AccountClient('secundaria', client, tweets_per_hour=1, burst=1)
+
+    assert registry.post(['uno', 'dos'], 'skip-test', extra=[account]) == {'secundaria': [True, False]}
+    assert client.posted == ['uno']
+    assert [(t.content, t.success) for t in Tweet.query.all()] == [('uno', True)]
+
+    rendered = metrics.registry.render()
+    assert 'bot_tweets_failed_total{tweet_type="skip-test"}' not in rendered
+    assert 'bot_account_posts_total{account="secundaria",result="skipped"} 1' in rendered
+
+def test_main_account_stored_like_post_tweet(app):
+    from accounts import AccountRegistry, AccountClient, MAIN_ACCOUNT
+    from models import Tweet
+
+    registry = AccountRegistry()
+    registry._loaded = True
+    main = AccountClient(MAIN_ACCOUNT, FakeClient())
+    other = AccountClient('secundaria', FakeClient())
+
+    registry.post('hola', 'news', extra=[main, other])
+    assert {tweet.account for tweet in Tweet.query.all()} == {None, 'secundaria'}
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    import accounts
+    now = [1000.0]
+    monkeypatch.setattr(accounts.time, 'monotonic', lambda: now[0])
+
+    bucket = accounts.TokenBucket(rate_per_second=0.5, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    now[0] += 1.0
+    assert not bucket.try_acquire()
+    now[0] += 1.0
+    assert bucket.try_acquire()
+
+    # Nunca acumula más que la capacidad
+    now[0] += 3600
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+
+def test_failures_pause_account_until_cooldown(monkeypatch):
+    import accounts
+    now = [1000.0]
+    monkeypatch.setattr(accounts.time, 'monotonic', lambda: now[0])
+
+    client = FakeClient(fail=True)
+    account = accounts.AccountClient('secundaria', client, tweets_per_hour=3600, burst=10)
+    assert [account.post('x')[0] for _ in range(accounts.FAILURE_THRESHOLD)] == ['failure'] * accounts.FAILURE_THRESHOLD
+    assert account.post('x') == ('skipped', 'Cuenta pausada por fallos consecutivos')
+
+    client.fail = False
+    now[0] += accounts.COOLDOWN_SECONDS
+    assert account.post('x') == ('success', None)
+    assert account.consecutive_failures == 0
+
+def test_broadcast_isolates_failing_account(app, monkeypatch):
+    import accounts
+    from app import db
+    from models import Tweet
+    from twitter_bot import TwitterBot
+
+    registry = accounts.AccountRegistry()
+    monkeypatch.setattr(accounts, 'registry', registry)
+    for name in ('rota', 'sana'):
+        db.session.add(TwitterAccount(name=name, **CREDENTIALS))
+    db.session.commit()
+    registry.load()
+    broken, healthy = FakeClient(fail=True), FakeClient()
+    registry.accounts(['rota'])[0].client = broken
+    registry.accounts(['sana'])[0].client = healthy
+
+    bot = TwitterBot()
+    bot.client = main = FakeClient()
+    for i in range(accounts.FAILURE_THRESHOLD + 1):
+        assert bot.broadcast(f'tweet {i}', 'news') is True
+
+    assert len(main.posted) == len(healthy.posted) == accounts.FAILURE_THRESHOLD + 1
+    failed = Tweet.query.filter_by(success=False).all()
+    assert {t.account for t in failed} == {'rota'}
+    # La última publicación de 'rota' se omitió por la pausa: no queda como fallida
+    assert len(failed) == accounts.FAILURE_THRESHOLD
+
+def test_invalidate_keeps_state_of_other_accounts(app):
+    import accounts
+    from app import db
+
+    registry = accounts.AccountRegistry()
+    for name in ('a', 'b'):
+        db.session.add(TwitterAccount(name=name, **CREDENTIALS))
+    db.session.commit()
+    a, b = registry.accounts()
+
+    registry.invalidate()
+    assert registry.accounts(['a'])[0] is a
+
+    registry.invalidate('b')
+    assert registry.accounts(['a'])[0] is a
+    assert registry.accounts(['b'])[0] is not b
@@ -0,0 +1,57 @@
+from datetime import datetime
+from app import db
+from models import Configuration, Tweet
+import cache
+
+def _add_tweet():
+    db.session.add(Tweet(content='hola', tweet_type='news', posted_at=datetime.utcnow()))
+    db.session.commit()
+
+def test_conditional_response_returns_304_until_data_changes(client):
+    first = client.get('/api/stats')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    cached = client.get('/api/stats', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
+    _add_tweet()
+    changed = client.get('/api/stats', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['total_tweets'] == 1
+
+def test_get_or_render_renders_once_per_version(app):
+    calls = []
+
+    def render():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_render('test:render', ('tweet',), render) == 1
+    assert cache.get_or_render('test:render', ('tweet',), render) == 1
+
+    _add_tweet()
+    assert cache.get_or_render('test:render', ('tweet',), render) == 2
+
+def test_unrelated_tables_do_not_invalidate(app):
+    before = cache.version('tweet')
+    db.session.add(Configuration(key='weather_city', value='Mendoza'))
+    db.session.commit()
+    assert cache.version('tweet') == before
+
+def test_bulk_delete_invalidates(app):
+    _add_tweet()
+    before = cache.version('tweet')
+    Tweet.query.delete()
+    db.session.commit()
+    assert cache.version('tweet') != before
+
+def test_rollback_does_not_invalidate(app):
+    before = cache.version('tweet')
+    db.session.add(Tweet(content='hola', tweet_type='news'))
+    db.session.flush()
+    db.session.rollback()
+    assert cache.version('tweet') == before
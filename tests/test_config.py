@@ -0,0 +1,73 @@
+from routes import get_config, get_configs, set_configs
+import scheduler
+
+def test_set_configs_returns_only_changed_keys(app):
+    assert set_configs({'weather_city': 'Córdoba', 'news_country': 'ar'}) == ['weather_city', 'news_country']
+    assert set_configs({'weather_city': 'Córdoba', 'news_country': 'uy'}) == ['news_country']
+    assert get_configs(['weather_city', 'news_country']) == {'weather_city': 'Córdoba', 'news_country': 'uy'}
+
+def test_api_config_updates_values(client):
+    response = client.post('/api/config', json={'weather_city': 'Rosario', 'tweet_schedule_news': '07:00, 19:30'})
+    assert response.status_code == 200
+    assert sorted(response.get_json()['updated']) == ['tweet_schedule_news', 'weather_city']
+    assert get_config('tweet_schedule_news') == '07:00, 19:30'
+
+def test_api_config_masks_secrets(client):
+    client.post('/api/config', json={'news_api_key': 'secreto'})
+    assert client.get('/api/config?keys=news_api_key').get_json() == {'news_api_key': '***'}
+
+    # Devolver el valor enmascarado no lo pisa
+    assert client.post('/api/config', json={'news_api_key': '***'}).get_json()['updated'] == []
+    assert get_config('news_api_key') == 'secreto'
+
+def test_api_config_rejects_unknown_keys(client):
+    response = client.post('/api/config', json={'nope': 'x'})
+    assert response.status_code == 400
+    assert response.get_json()['keys'] == ['nope']
+
+def test_api_config_rejects_invalid_schedule(client):
+    response = client.post('/api/config', json={'weather_city': 'Salta', 'tweet_schedule_weather': '8am'})
+    assert response.status_code == 400
+    assert list(response.get_json()['keys']) == ['tweet_schedule_weather']
+    assert get_config('tweet_schedule_weather') is None
+    assert get_config('weather_city') is None
+
+def test_api_config_rejects_sample_rate_out_of_range(client):
+    for value in ('1.5', '-0.1', 'mucho'):
+        assert client.post('/api/config', json={'trace_sample_rate': value}).status_code == 400
+    assert get_config('trace_sample_rate') is None
+
+def test_config_form_flashes_invalid_schedule(client):
+    response = client.post('/config', data={'tweet_schedule_currency': '25:00'}, follow_redirects=True)
+    assert response.status_code == 200
+    assert 'formato HH:MM' in response.get_data(as_text=True)
+    assert get_config('tweet_schedule_currency') is None
+
+def test_parse_schedule_times():
+    assert scheduler.parse_schedule_times(' 08:00,,23:59 ') == ['08:00', '23:59']
+    assert scheduler.parse_schedule_times('08:00:30') == ['08:00:30']
+    for value in ('8:00', '8am', '24:00', '12:60', '08:00:60'):
+        try:
+            scheduler.parse_schedule_times(value)
+        except ValueError:
+            continue
+        raise AssertionError(f'{value} debería ser inválido')
+
+def test_setup_schedules_keeps_jobs_with_invalid_stored_value(app):
+    bot_scheduler = scheduler.BotScheduler()
+    bot_scheduler._setup_schedules()
+    assert len(bot_scheduler.jobs.jobs) == 8
+
+    # Un valor guardado antes de la validación no deja al bot sin jobs
+    set_configs({'tweet_schedule_weather': '8am'})
+    bot_scheduler._setup_schedules()
+    jobs = bot_scheduler.jobs.jobs
+    assert len(jobs) == 8
+    assert any(job.unit == 'hours' for job in jobs)
+
+def test_setup_schedules_keeps_seconds(app):
+    set_configs({'tweet_schedule_news': '08:00:30'})
+    bot_scheduler = scheduler.BotScheduler()
+    bot_scheduler._setup_schedules()
+    news = [job for job in bot_scheduler.jobs.jobs if job.job_func.args[0] == 'news']
+    assert [(job.at_time.hour, job.at_time.minute, job.at_time.second) for job in news] == [(8, 0, 30)]
@@ -0,0 +1,76 @@
+from events import EventBus
+
+def _drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+def test_subscribe_replays_missed_events():
+    bus = EventBus()
+    for i in range(5):
+        bus.publish('tweet', {'n': i})
+
+    subscriber = bus.subscribe(last_event_id=f'{bus.boot_id}-3')
+    assert [e[0] for e in _drain(subscriber)] == [4, 5]
+    assert not subscriber.lagged
+
+def test_subscribe_without_last_event_id_gets_only_new_events():
+    bus = EventBus()
+    bus.publish('tweet', {})
+    subscriber = bus.subscribe()
+    bus.publish('job', {'job': 'news'})
+
+    [(event_id, event_type, payload)] = _drain(subscriber)
+    assert (event_id, event_type, payload) == (2, 'job', '{"job": "news"}')
+
+def test_subscribe_lagged_when_history_was_evicted():
+    bus = EventBus(history_size=3)
+    for i in range(10):
+        bus.publish('tweet', {'n': i})
+
+    subscriber = bus.subscribe(last_event_id=f'{bus.boot_id}-2')
+    assert subscriber.lagged
+    assert [e[0] for e in _drain(subscriber)] == [8, 9, 10]
+
+def test_subscribe_lagged_after_server_restart():
+    old = EventBus()
+    for i in range(5):
+        old.publish('tweet', {'n': i})
+
+    # El proceso nuevo ya publicó más eventos que el id que trae el cliente:
+    # no debe reenviarlos como si fueran los que se perdió
+    restarted = EventBus()
+    for i in range(10):
+        restarted.publish('tweet', {'n': i})
+    subscriber = restarted.subscribe(last_event_id=f'{old.boot_id}-5')
+    assert subscriber.lagged
+    assert _drain(subscriber) == []
+
+def test_subscribe_lagged_with_invalid_last_event_id():
+    bus = EventBus()
+    assert bus.subscribe(last_event_id='5').lagged
+    assert bus.subscribe(last_event_id=f'{bus.boot_id}-x').lagged
+
+def test_stream_ids_carry_boot_id():
+    bus = EventBus()
+    subscriber_stream = bus.stream(heartbeat=0.01, max_seconds=1)
+    assert next(subscriber_stream).startswith('retry:')
+    bus.publish('tweet', {'n': 1})
+    assert next(subscriber_stream) == f'id: {bus.boot_id}-1\nevent: tweet\ndata: {{"n": 1}}\n\n'
+    subscriber_stream.close()
+    assert bus.subscriber_count() == 0
+
+def test_publish_marks_slow_subscriber_lagged():
+    bus = EventBus(queue_size=2)
+    subscriber = bus.subscribe()
+    for i in range(3):
+        bus.publish('tweet', {'n': i})
+    assert subscriber.lagged
+    assert len(_drain(subscriber)) == 2
+
+def test_stream_ends_after_max_seconds():
+    bus = EventBus()
+    chunks = list(bus.stream(heartbeat=0.01, max_seconds=0.05))
+    assert chunks[0].startswith('retry:')
+    assert bus.subscriber_count() == 0
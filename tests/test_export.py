@@ -0,0 +1,78 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+from app import db
+from models import ApiLog, Tweet, TweetArchive
+import export
+
+BASE = datetime(2026, 1, 1, 10, 0)
+
+def _add_tweets(count, tweet_type='news', start=BASE):
+    db.session.add_all([
+        Tweet(content=f'tweet {i}', tweet_type=tweet_type, posted_at=start + timedelta(minutes=i))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_iter_batches_pages_by_id(app):
+    _add_tweets(5)
+    batches = list(export.iter_batches(Tweet, ['id', 'content'], batch_size=2))
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert [row[0] for rows in batches for row in rows] == [1, 2, 3, 4, 5]
+
+def test_export_spans_several_batches(client):
+    count = export.BATCH_SIZE * 2 + 1
+    _add_tweets(count)
+
+    rows = _ndjson(client.get('/export/tweets'))
+    assert len(rows) == count
+    assert [row['id'] for row in rows] == list(range(1, count + 1))
+    assert set(rows[0]) == set(export.TWEET_FIELDS)
+
+def test_export_filters_by_type_and_range(client):
+    _add_tweets(5, 'news')
+    _add_tweets(5, 'weather')
+
+    rows = _ndjson(client.get('/export/tweets?type=weather&since=2026-01-01T10:02:00&until=2026-01-01T10:04:00'))
+    assert [(row['tweet_type'], row['content']) for row in rows] == [('weather', 'tweet 2'), ('weather', 'tweet 3')]
+
+def test_export_converts_timezone_offsets_to_utc(client):
+    _add_tweets(5)
+
+    # 13:02 en UTC+3 son las 10:02 UTC
+    rows = _ndjson(client.get('/export/tweets', query_string={'since': '2026-01-01T13:02:00+03:00'}))
+    assert [row['content'] for row in rows] == ['tweet 2', 'tweet 3', 'tweet 4']
+
+def test_export_rejects_invalid_dates(client):
+    assert client.get('/export/tweets?since=ayer').status_code == 400
+
+def test_export_archived_tweets_first_with_original_id(client):
+    db.session.add(TweetArchive(original_id=7, content='viejo', tweet_type='news', posted_at=BASE - timedelta(days=200)))
+    db.session.commit()
+    _add_tweets(1)
+
+    rows = _ndjson(client.get('/export/tweets?archived=1'))
+    assert [(row['id'], row['content']) for row in rows] == [(7, 'viejo'), (1, 'tweet 0')]
+
+def test_export_csv_gzip(client):
+    _add_tweets(2)
+
+    response = client.get('/export/tweets?format=csv&gzip=1')
+    assert response.mimetype == 'application/gzip'
+    assert 'tweets.csv.gz' in response.headers['Content-Disposition']
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert lines[0] == ','.join(export.TWEET_FIELDS)
+    assert len(lines) == 3
+
+def test_export_api_logs_by_api(client):
+    db.session.add_all([
+        ApiLog(api_name='NewsAPI', status_code=200, created_at=BASE),
+        ApiLog(api_name='OpenWeatherMap', status_code=500, created_at=BASE),
+    ])
+    db.session.commit()
+
+    rows = _ndjson(client.get('/export/api_logs?api=OpenWeatherMap'))
+    assert [(row['api_name'], row['status_code']) for row in rows] == [('OpenWeatherMap', 500)]
@@ -0,0 +1,50 @@
+import metrics
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('test_duration_seconds', 'Duración', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, job='news')
+
+    assert histogram.render() == [
+        '# HELP test_duration_seconds Duración',
+        '# TYPE test_duration_seconds histogram',
+        'test_duration_seconds_bucket{job="news",le="0.1"} 2',
+        'test_duration_seconds_bucket{job="news",le="1"} 3',
+        'test_duration_seconds_bucket{job="news",le="+Inf"} 4',
+        'test_duration_seconds_sum{job="news"} 3.65',
+        'test_duration_seconds_count{job="news"} 4',
+    ]
+
+def test_histogram_time_observes_block():
+    histogram = metrics.Histogram('test_block_seconds', 'Bloque')
+    with histogram.time(job='weather'):
+        pass
+    assert 'test_block_seconds_count{job="weather"} 1' in histogram.render()
+
+def test_counter_escapes_labels():
+    counter = metrics.Counter('test_total', 'Total')
+    counter.inc(endpoint='a"b\\c')
+    counter.inc(2, endpoint='a"b\\c')
+    assert counter.render()[-1] == 'test_total{endpoint="a\\"b\\\\c"} 3'
+
+def test_registry_reuses_metrics_by_name():
+    registry = metrics.Registry()
+    assert registry.counter('test_total', 'Total') is registry.counter('test_total', 'Otro')
+
+def test_metrics_endpoint(client):
+    metrics.tweets_failed_total.inc(tweet_type='metrics-test')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    body = response.get_data(as_text=True)
+    assert '# TYPE bot_api_request_duration_seconds histogram' in body
+    assert 'bot_tweets_failed_total{tweet_type="metrics-test"} 1' in body
+
+def test_post_without_client_counts_failure(app):
+    from twitter_bot import TwitterBot
+    bot = TwitterBot()
+    bot.client = None
+
+    assert bot.post_tweet('hola', 'no-client') is False
+    assert 'bot_tweets_failed_total{tweet_type="no-client"} 1' in metrics.registry.render()
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from app import db
+from models import ApiLog, ApiLogRollup, JobTrace, Tweet, TweetArchive, TweetRollup
+import retention
+
+NOW = datetime(2026, 6, 1, 12, 30)
+OLD = NOW - timedelta(days=200)
+
+def _add_tweet(posted_at, success=True, tweet_type='news'):
+    tweet = Tweet(content='hola', tweet_type=tweet_type, posted_at=posted_at, success=success)
+    db.session.add(tweet)
+    db.session.commit()
+    return tweet
+
+def test_compact_api_logs_rolls_up_old_hours(app):
+    hour = OLD.replace(minute=0, second=0, microsecond=0)
+    db.session.add_all([
+        ApiLog(api_name='NewsAPI', status_code=200, response_time=0.1, created_at=hour + timedelta(minutes=5)),
+        ApiLog(api_name='NewsAPI', status_code=500, response_time=0.3, created_at=hour + timedelta(minutes=10)),
+        ApiLog(api_name='NewsAPI', status_code=200, response_time=0.2, created_at=NOW),
+    ])
+    db.session.commit()
+
+    assert retention.compact_api_logs(NOW) == 2
+
+    rollup = ApiLogRollup.query.one()
+    assert (rollup.api_name, rollup.hour, rollup.count, rollup.error_count) == ('NewsAPI', hour, 2, 1)
+    assert rollup.p50_response_time == 0.1
+    assert rollup.p95_response_time == 0.3
+    assert ApiLog.query.count() == 1
+
+def test_archive_tweets_keeps_totals(app):
+    _add_tweet(OLD)
+    _add_tweet(OLD, success=False)
+    _add_tweet(NOW)
+
+    assert retention.archive_tweets(NOW) == 2
+
+    assert Tweet.query.count() == 1
+    assert TweetArchive.query.count() == 2
+    assert TweetRollup.query.one().failed_count == 1
+    assert retention.tweet_totals() == (2, 1)
+
+def test_archive_tweets_when_sqlite_reuses_tweet_ids(app):
+    # Sin filas en Tweet, SQLite vuelve a asignar el id 1
+    first = _add_tweet(OLD).id
+    assert retention.archive_tweets(NOW) == 1
+
+    second = _add_tweet(OLD + timedelta(hours=1)).id
+    assert second == first
+    assert retention.archive_tweets(NOW) == 1
+
+    archived = TweetArchive.query.order_by(TweetArchive.id).all()
+    assert [a.original_id for a in archived] == [first, first]
+    assert len({a.id for a in archived}) == 2
+
+def test_prune_job_traces(app):
+    db.session.add_all([
+        JobTrace(trace_id='old', job_name='news', started_at=NOW - timedelta(days=30)),
+        JobTrace(trace_id='new', job_name='news', started_at=NOW - timedelta(days=1)),
+    ])
+    db.session.commit()
+
+    assert retention.prune_job_traces(NOW) == 1
+    assert [t.trace_id for t in JobTrace.query.all()] == ['new']
+
+def test_upgrade_schema_creates_compaction_indexes(app):
+    inspector = db.inspect(db.engine)
+    assert 'ix_tweet_posted_at' in {i['name'] for i in inspector.get_indexes('tweet')}
+    assert 'ix_api_log_created_at' in {i['name'] for i in inspector.get_indexes('api_log')}
+
+def _auto_vacuum_mode():
+    raw = db.engine.raw_connection()
+    try:
+        return raw.cursor().execute('PRAGMA auto_vacuum').fetchone()[0]
+    finally:
+        raw.close()
+
+def test_hourly_vacuum_never_switches_mode(app):
+    if _auto_vacuum_mode() != 2:
+        assert retention.incremental_vacuum() is False
+        assert _auto_vacuum_mode() != 2
+
+    assert retention.enable_incremental_vacuum()
+    assert _auto_vacuum_mode() == 2
+    assert retention.incremental_vacuum() is True
@@ -0,0 +1,60 @@
+import pytest
+from models import JobTrace
+import tracing
+
+@pytest.fixture
+def sample_rate():
+    original = tracing.sample_rate
+    yield
+    tracing.sample_rate = original
+
+def test_nested_spans_record_depth_and_errors(app):
+    with tracing.trace_run('news') as trace:
+        with tracing.span('fetch'):
+            with tracing.span('parse'):
+                pass
+        with pytest.raises(ValueError):
+            with tracing.span('post'):
+                raise ValueError('boom')
+
+    # Los spans se agregan al cerrarse: el interno primero
+    assert [(s[0], s[1], s[4]) for s in trace.spans] == [
+        ('parse', 1, None), ('fetch', 0, None), ('post', 0, 'ValueError')
+    ]
+    saved = JobTrace.query.filter_by(trace_id=trace.trace_id).one()
+    assert saved.job_name == 'news'
+    assert [s[0] for s in saved.span_list()] == ['parse', 'fetch', 'post']
+
+def test_trace_saved_when_job_raises(app):
+    with pytest.raises(RuntimeError):
+        with tracing.trace_run('weather') as trace:
+            raise RuntimeError('boom')
+    assert tracing.current_trace() is None
+    assert JobTrace.query.filter_by(trace_id=trace.trace_id).count() == 1
+
+def test_sample_rate_zero_skips_trace(app, sample_rate):
+    tracing.sample_rate = 0.0
+    with tracing.trace_run('news') as trace:
+        with tracing.span('fetch'):
+            pass
+    assert trace is None
+    assert JobTrace.query.count() == 0
+
+def test_nested_trace_run_reuses_outer_trace(app):
+    with tracing.trace_run('outer', save=False) as outer:
+        with tracing.trace_run('inner') as inner:
+            assert inner is None
+            assert tracing.current_trace() is outer
+    assert JobTrace.query.count() == 0
+
+def test_profile_request_applies_to_next_run_only(app, sample_rate):
+    # El perfil pedido se captura aunque la ejecución no entre en el muestreo
+    tracing.sample_rate = 0.0
+    tracing.request_profile()
+    with tracing.trace_run('news', save=False) as profiled:
+        sum(range(100))
+    with tracing.trace_run('news', save=False) as skipped:
+        pass
+
+    assert 'function calls' in profiled.profile
+    assert skipped is None
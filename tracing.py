@@ -0,0 +1,163 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Fracción de ejecuciones que se trazan (0.0 - 1.0)
+sample_rate = 1.0
+
+_local = threading.local()
+_profile_lock = threading.Lock()
+_profile_next = False
+
+class Trace:
+    """Traza de una ejecución de tarea con sus spans"""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = datetime.utcnow()
+        self.duration = None
+        self.profile = None
+        # Cada span: [nombre, profundidad, inicio_ms, duración_ms, error]
+        self.spans = []
+        self._t0 = time.perf_counter()
+        self._depth = 0
+
+    def spans_json(self):
+        """Serializar los spans en formato compacto"""
+        return json.dumps(self.spans, separators=(',', ':'))
+
+class _Span:
+    """Span activo dentro de una traza"""
+
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.trace._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        trace = self.trace
+        trace._depth -= 1
+        trace.spans.append([
+            self.name,
+            trace._depth,
+            round((self.start - trace._t0) * 1000, 3),
+            round((end - self.start) * 1000, 3),
+            exc_type.__name__ if exc_type else None
+        ])
+        return False
+
+class _NoopSpan:
+    """Span vacío usado cuando no hay traza activa"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def current_trace():
+    """Obtener la traza activa del thread actual"""
+    return getattr(_local, 'trace', None)
+
+def span(name):
+    """Medir una etapa dentro de la traza activa (no hace nada si no hay traza)"""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name)
+
+def request_profile():
+    """Activar captura con cProfile para la próxima ejecución trazada"""
+    global _profile_next
+    with _profile_lock:
+        _profile_next = True
+
+def _take_profile_request():
+    global _profile_next
+    with _profile_lock:
+        requested = _profile_next
+        _profile_next = False
+    return requested
+
+@contextmanager
+def trace_run(name, save=True):
+    """Abrir una traza para una ejecución de tarea (entrega None si no se traza)"""
+    # No anidar trazas: los runs internos se registran como spans del externo
+    if current_trace() is not None:
+        yield None
+        return
+
+    profile = _take_profile_request()
+    if not profile and random.random() >= sample_rate:
+        yield None
+        return
+
+    trace = Trace(name)
+    _local.trace = trace
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        yield trace
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            trace.profile = _format_profile(profiler)
+
+        trace.duration = time.perf_counter() - trace._t0
+        _local.trace = None
+
+        if save:
+            save_trace(trace)
+
+def _format_profile(profiler, limit=40):
+    """Convertir el resultado de cProfile en texto legible"""
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+def save_trace(trace):
+    """Guardar una traza en la base de datos"""
+    from app import db
+    from models import JobTrace
+
+    try:
+        record = JobTrace(
+            trace_id=trace.trace_id,
+            job_name=trace.name,
+            started_at=trace.started_at,
+            duration=trace.duration,
+            spans=trace.spans_json(),
+            profile=trace.profile
+        )
+        db.session.add(record)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error guardando traza {trace.trace_id}: {e}")
@@ -1,12 +1,27 @@
 import os
+import time
 import logging
 import tweepy
 from datetime import datetime
 from app import db
 from models import Tweet, ApiLog
+import metrics
+import tracing
+import events
 
 logger = logging.getLogger(__name__)
 
+def publish_tweet_event(tweet):
+    """Publicar un tweet guardado en el bus de eventos del dashboard"""
+    events.publish('tweet', {
+        'content': tweet.content,
+        'type': tweet.tweet_type,
+        'account': tweet.account,
+        'success': tweet.success,
+        'error_message': tweet.error_message,
+        'posted_at': tweet.posted_at.strftime('%d/%m/%Y %H:%M')
+    })
+
 class TwitterBot:
     """Clase principal para manejar la integración con Twitter"""
     
@@ -18,6 +33,7 @@ class TwitterBot:
         
         self.api = None
         self.client = None
+        self._main_account = None
         
         # Solo cargar credenciales de base de datos si estamos dentro del contexto Flask
         self._load_credentials_safely()
@@ -76,29 +92,37 @@ class TwitterBot:
         try:
             if not self.client:
                 logger.error("Cliente de Twitter no inicializado")
+                metrics.tweets_failed_total.inc(tweet_type=tweet_type)
                 return False
             
             # Limitar a 280 caracteres
             if len(content) > 280:
                 content = content[:277] + "..."
             
-            response = self.client.create_tweet(text=content)
+            start = time.perf_counter()
+            with tracing.span('create_tweet'):
+                response = self.client.create_tweet(text=content)
+            metrics.tweet_post_duration.observe(time.perf_counter() - start, tweet_type=tweet_type)
             
             # Guardar en base de datos
-            tweet = Tweet(
-                content=content,
-                tweet_type=tweet_type,
-                success=True,
-                posted_at=datetime.utcnow()
-            )
-            db.session.add(tweet)
-            db.session.commit()
+            with tracing.span('commit'):
+                tweet = Tweet(
+                    content=content,
+                    tweet_type=tweet_type,
+                    success=True,
+                    posted_at=datetime.utcnow()
+                )
+                db.session.add(tweet)
+                db.session.commit()
             
+            metrics.tweets_posted_total.inc(tweet_type=tweet_type)
+            self._publish_tweet(tweet)
             logger.info(f"Tweet publicado exitosamente: {content[:50]}...")
             return True
             
         except Exception as e:
             logger.error(f"Error al publicar tweet: {e}")
+            metrics.tweets_failed_total.inc(tweet_type=tweet_type)
             
             # Guardar error en base de datos
             tweet = Tweet(
@@ -110,9 +134,50 @@ class TwitterBot:
             )
             db.session.add(tweet)
             db.session.commit()
+            self._publish_tweet(tweet)
             
             return False
     
+    def broadcast(self, content, tweet_type="manual", accounts=None):
+        """Publicar en la cuenta principal y en las cuentas registradas a la vez
+        
+        Sin cuentas adicionales se comporta igual que post_tweet. Con `accounts`
+        se publica solo en esas cuentas registradas.
+        """
+        from accounts import registry, AccountClient, MAIN_ACCOUNT
+        
+        if not registry.accounts(accounts):
+            return self.post_tweet(content, tweet_type) if accounts is None else False
+        
+        extra = []
+        if accounts is None and self.client:
+            if self._main_account is None:
+                self._main_account = AccountClient(MAIN_ACCOUNT, self._fan_out_client())
+            extra.append(self._main_account)
+        
+        results = registry.post(content, tweet_type, names=accounts, extra=extra)
+        return any(success for posts in results.values() for success in posts)
+    
+    def _fan_out_client(self):
+        """Cliente de la cuenta principal para broadcast, sin esperar el límite de la API
+        
+        Con wait_on_rate_limit el thread dormiría dentro del pool y frenaría a las
+        demás cuentas; al fallar, el AccountClient aplica su propia pausa.
+        """
+        if isinstance(self.client, tweepy.Client) and self.client.wait_on_rate_limit:
+            return tweepy.Client(
+                consumer_key=self.consumer_key,
+                consumer_secret=self.consumer_secret,
+                access_token=self.access_token,
+                access_token_secret=self.access_token_secret,
+                wait_on_rate_limit=False
+            )
+        return self.client
+    
+    def _publish_tweet(self, tweet):
+        """Notificar al dashboard un tweet nuevo"""
+        publish_tweet_event(tweet)
+    
     def format_weather_tweet(self, weather_data):
         """Formatear tweet de clima"""
         if not weather_data: